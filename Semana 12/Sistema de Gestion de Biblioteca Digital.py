@@ -1,5 +1,70 @@
 from __future__ import annotations
-from typing import Dict, List, Set, Iterable, Optional
+import datetime as dt
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left, bisect_right, insort
+from contextlib import nullcontext
+from typing import ContextManager, Dict, FrozenSet, List, Set, Iterable, Optional, Tuple
+
+# Módulos hermanos (importador y motor de búsqueda), aunque se ejecute desde otra carpeta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from importador_catalogo import ResultadoImportacion, clave_isbn, leer_filas, validar_en_paralelo  # noqa: E402
+from motor_busqueda import MotorBusqueda  # noqa: E402
+
+
+DIAS_PRESTAMO = 14  # plazo por defecto de un préstamo
+FRANJAS_POR_DEFECTO = 64  # nº de candados por tipo de clave en modo "franjas"
+_SIN_CANDADO = nullcontext()
+
+
+class TablaInterna:
+    """
+    Tabla de cadenas repetidas (patrón flyweight).
+
+    Cada valor distinto se guarda una sola vez y se referencia con un entero
+    pequeño. También agrupa los IDs por su forma en minúsculas para comparar
+    sin distinguir mayúsculas sin recorrer la tabla.
+
+    Los valores nunca se eliminan: un ID debe seguir siendo válido mientras
+    exista algún objeto que lo use, y la tabla no lleva esa cuenta.
+    """
+    __slots__ = ("_valores", "_ids", "_ids_por_clave", "_candado")
+
+    def __init__(self) -> None:
+        self._valores: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._ids_por_clave: Dict[str, FrozenSet[int]] = {}
+        self._candado = threading.Lock()
+
+    def id_de(self, valor: str) -> int:
+        """ID del valor; lo registra si es nuevo."""
+        ident = self._ids.get(valor)
+        if ident is not None:
+            return ident
+        with self._candado:  # doble comprobación: dos hilos no deben crear dos IDs
+            ident = self._ids.get(valor)
+            if ident is None:
+                ident = len(self._valores)
+                self._valores.append(valor)
+                self._ids[valor] = ident
+                clave = valor.lower()
+                self._ids_por_clave[clave] = self._ids_por_clave.get(clave, frozenset()) | {ident}
+            return ident
+
+    def ids_sin_mayusculas(self, valor: str) -> FrozenSet[int]:
+        """IDs de todos los valores iguales a 'valor' sin distinguir mayúsculas."""
+        return self._ids_por_clave.get(valor.lower(), frozenset())
+
+    def valor(self, ident: int) -> str:
+        return self._valores[ident]
+
+    def __len__(self) -> int:
+        return len(self._valores)
 
 
 class Libro:
@@ -8,9 +73,24 @@ class Libro:
 
     Requisitos clave:
     - (título, autor) se almacenan en una TUPLA inmutable.
-    - isbn y categoría se guardan como strings.
+    - isbn se guarda como string en su forma normalizada (clave_isbn), que es
+      la clave del catálogo.
+
+    Autor y categoría se repiten mucho en un catálogo real, por eso se guardan
+    en tablas compartidas (TablaInterna) y el libro sólo conserva su ID entero
+    (categoria_id para la categoría). Las propiedades autor/categoria devuelven
+    el texto como antes.
+
+    Las tablas son atributos de clase porque un Libro se crea antes de añadirlo
+    a una Biblioteca, y por eso las comparten todas. Tampoco se vacían:
+    quitar_libro no libera el autor ni la categoría, que quedan en memoria
+    mientras dure el proceso. Con muchos menos autores y categorías distintos
+    que libros, ese coste es pequeño frente a lo que ahorra el interning.
     """
-    __slots__ = ("_titulo_autor", "categoria", "isbn")
+    __slots__ = ("_titulo_autor", "_categoria_id", "isbn")
+
+    AUTORES = TablaInterna()
+    CATEGORIAS = TablaInterna()
 
     def __init__(self, titulo: str, autor: str, categoria: str, isbn: str) -> None:
         if not titulo or not autor:
@@ -20,10 +100,12 @@ class Libro:
         if not isbn:
             raise ValueError("El ISBN no puede estar vacío.")
 
-        # Tupla inmutable con (titulo, autor)
-        self._titulo_autor: tuple[str, str] = (titulo.strip(), autor.strip())
-        self.categoria: str = categoria.strip()
-        self.isbn: str = str(isbn).strip()
+        # Tupla inmutable con (titulo, id del autor)
+        self._titulo_autor: tuple[str, int] = (titulo.strip(), Libro.AUTORES.id_de(autor.strip()))
+        self._categoria_id: int = Libro.CATEGORIAS.id_de(categoria.strip())
+        self.isbn: str = clave_isbn(isbn)
+        if not self.isbn:
+            raise ValueError("El ISBN no puede estar vacío.")
 
     @property
     def titulo(self) -> str:
@@ -31,7 +113,21 @@ class Libro:
 
     @property
     def autor(self) -> str:
-        return self._titulo_autor[1]
+        return Libro.AUTORES.valor(self._titulo_autor[1])
+
+    @property
+    def categoria(self) -> str:
+        return Libro.CATEGORIAS.valor(self._categoria_id)
+
+    @categoria.setter
+    def categoria(self, categoria: str) -> None:
+        if not categoria:
+            raise ValueError("La categoría no puede estar vacía.")
+        self._categoria_id = Libro.CATEGORIAS.id_de(categoria.strip())
+
+    @property
+    def categoria_id(self) -> int:
+        return self._categoria_id
 
     def __repr__(self) -> str:
         return f"Libro(titulo='{self.titulo}', autor='{self.autor}', cat='{self.categoria}', isbn='{self.isbn}')"
@@ -72,126 +168,749 @@ class Usuario:
         return f"Usuario(nombre='{self.nombre}', user_id='{self.user_id}', prestados={len(self.libros_prestados)})"
 
 
+class RegistroPrestamo:
+    """
+    Préstamo de un libro a un usuario con sus fechas.
+
+    - fecha_devolucion es None mientras el préstamo está activo.
+    """
+    __slots__ = ("isbn", "user_id", "fecha_prestamo", "fecha_vencimiento", "fecha_devolucion")
+
+    def __init__(self, isbn: str, user_id: str, fecha_prestamo: dt.date, fecha_vencimiento: dt.date,
+                 fecha_devolucion: Optional[dt.date] = None) -> None:
+        if fecha_vencimiento < fecha_prestamo:
+            raise ValueError("La fecha de vencimiento no puede ser anterior a la del préstamo.")
+        self.isbn: str = isbn
+        self.user_id: str = user_id
+        self.fecha_prestamo: dt.date = fecha_prestamo
+        self.fecha_vencimiento: dt.date = fecha_vencimiento
+        self.fecha_devolucion: Optional[dt.date] = fecha_devolucion
+
+    def esta_vencido(self, al: dt.date) -> bool:
+        """Vencido si sigue activo y su vencimiento es anterior a la fecha dada."""
+        return self.fecha_devolucion is None and self.fecha_vencimiento < al
+
+    def __repr__(self) -> str:
+        return (f"RegistroPrestamo(isbn='{self.isbn}', user_id='{self.user_id}', "
+                f"prestado={self.fecha_prestamo}, vence={self.fecha_vencimiento}, "
+                f"devuelto={self.fecha_devolucion})")
+
+
+class HistorialPrestamos:
+    """
+    Archivo de préstamos cerrados.
+
+    Se guarda aparte de las estructuras vivas de la Biblioteca para que éstas
+    sólo crezcan con los préstamos activos. Cada registro archivado se almacena
+    como una TUPLA compacta y se indexa por usuario y por ISBN (posiciones).
+    """
+    def __init__(self) -> None:
+        # (isbn, user_id, fecha_prestamo, fecha_vencimiento, fecha_devolucion)
+        self._registros: List[Tuple[str, str, dt.date, dt.date, dt.date]] = []
+        self._por_usuario: Dict[str, List[int]] = {}
+        self._por_isbn: Dict[str, List[int]] = {}
+
+    def archivar(self, registro: RegistroPrestamo) -> None:
+        if registro.fecha_devolucion is None:
+            raise ValueError("Sólo se pueden archivar préstamos devueltos.")
+        pos = len(self._registros)
+        self._registros.append((registro.isbn, registro.user_id, registro.fecha_prestamo,
+                                registro.fecha_vencimiento, registro.fecha_devolucion))
+        self._por_usuario.setdefault(registro.user_id, []).append(pos)
+        self._por_isbn.setdefault(registro.isbn, []).append(pos)
+
+    def _materializar(self, posiciones: List[int]) -> List[RegistroPrestamo]:
+        return [RegistroPrestamo(*self._registros[pos]) for pos in posiciones]
+
+    def de_usuario(self, user_id: str) -> List[RegistroPrestamo]:
+        return self._materializar(self._por_usuario.get(user_id, []))
+
+    def de_libro(self, isbn: str) -> List[RegistroPrestamo]:
+        return self._materializar(self._por_isbn.get(clave_isbn(isbn), []))
+
+    def __len__(self) -> int:
+        return len(self._registros)
+
+
+class CandadosPorFranjas:
+    """
+    Conjunto fijo de candados ("lock striping").
+
+    Cada clave (ISBN o ID de usuario) se asigna a uno de N candados por hash,
+    así operaciones sobre claves distintas casi nunca compiten entre sí y la
+    memoria no crece con el número de libros o usuarios.
+    """
+    __slots__ = ("_candados",)
+
+    def __init__(self, franjas: int = FRANJAS_POR_DEFECTO) -> None:
+        if franjas < 1:
+            raise ValueError("Debe haber al menos una franja.")
+        self._candados: List[threading.Lock] = [threading.Lock() for _ in range(franjas)]
+
+    def para(self, clave: str) -> threading.Lock:
+        return self._candados[hash(clave) % len(self._candados)]
+
+
 class Biblioteca:
     """
     Gestiona:
-    - Diccionario de libros por ISBN: {isbn: Libro}
+    - Diccionario de libros por ISBN: {isbn: Libro}. Todos los métodos que reciben un
+      ISBN lo normalizan con clave_isbn, así "978-0-13-235088-4" y "9780132350884" son el mismo libro.
     - Diccionario de usuarios por ID: {user_id: Usuario}
     - Conjunto de IDs únicos: set(user_id)
     - Diccionario de préstamos: {isbn: user_id}
+    - Registros de préstamos activos: {isbn: RegistroPrestamo}
+    - Índice de vencimientos por día: {fecha: set(isbn)} + lista ORDENADA de fechas,
+      para consultar vencidos / próximos a vencer sin recorrer todos los préstamos.
+    - Historial de préstamos devueltos (HistorialPrestamos), separado de lo anterior.
+    - Motor de búsqueda por relevancia (MotorBusqueda) sobre título y autor,
+      actualizado al añadir/quitar libros.
 
     Reglas de negocio:
     - No se puede prestar un libro inexistente o ya prestado.
     - No se puede quitar un libro si está prestado.
     - No se puede dar de baja a un usuario con préstamos activos.
+
+    Modos de concurrencia (parámetro 'concurrencia'):
+    - None: sin candados (uso desde un solo hilo, como hasta ahora).
+    - "global": un único candado para todas las operaciones, consultas incluidas.
+    - "franjas": candados por ISBN y por usuario (CandadosPorFranjas). Siempre se
+      toma primero el del libro y después el del usuario, por lo que no hay
+      interbloqueos. Los índices compartidos (vencimientos, motor de búsqueda e
+      historial) y las altas/bajas del catálogo usan un candado propio que sólo se
+      retiene durante su actualización.
+    En los modos con candados, las consultas que recorren el catálogo (buscar_por_*,
+    listar_*) trabajan sobre una copia tomada con ese candado, así que no fallan
+    aunque otro hilo añada o quite libros mientras tanto.
     """
-    def __init__(self) -> None:
+    MODOS_CONCURRENCIA = (None, "global", "franjas")
+
+    def __init__(self, concurrencia: Optional[str] = None, franjas: int = FRANJAS_POR_DEFECTO) -> None:
+        if concurrencia not in self.MODOS_CONCURRENCIA:
+            raise ValueError(f"Modo de concurrencia no válido: {concurrencia!r}.")
+        self.concurrencia: Optional[str] = concurrencia
         self.catalogo_por_isbn: Dict[str, Libro] = {}
         self.usuarios_por_id: Dict[str, Usuario] = {}
         self.ids_usuarios: Set[str] = set()
         self.prestamos: Dict[str, str] = {}  # isbn -> user_id
+        self.registros_prestamo: Dict[str, RegistroPrestamo] = {}  # isbn -> préstamo activo
+        self._vencen_por_dia: Dict[dt.date, Set[str]] = {}
+        self._dias_vencimiento: List[dt.date] = []  # ordenada, sin repetidos
+        self.historial = HistorialPrestamos()
+        self.motor_busqueda = MotorBusqueda()
+
+        self._candados_libros: Optional[CandadosPorFranjas] = None
+        self._candados_usuarios: Optional[CandadosPorFranjas] = None
+        self._candado_global: ContextManager = _SIN_CANDADO
+        self._candado_indices: ContextManager = _SIN_CANDADO
+        if concurrencia == "global":
+            # Reentrante: prestar/devolver lo "toman" dos veces (libro y usuario) y los índices
+            self._candado_global = threading.RLock()
+            self._candado_indices = self._candado_global
+        elif concurrencia == "franjas":
+            self._candados_libros = CandadosPorFranjas(franjas)
+            self._candados_usuarios = CandadosPorFranjas(franjas)
+            self._candado_indices = threading.Lock()
+
+    # ------------------------
+    # Candados
+    # ------------------------
+    def _candado_libro(self, isbn: str) -> ContextManager:
+        if self._candados_libros is None:
+            return self._candado_global
+        return self._candados_libros.para(isbn)
+
+    def _candado_usuario(self, user_id: str) -> ContextManager:
+        if self._candados_usuarios is None:
+            return self._candado_global
+        return self._candados_usuarios.para(user_id)
 
     # ------------------------
     # Gestión de libros
     # ------------------------
     def anadir_libro(self, libro: Libro) -> None:
-        if libro.isbn in self.catalogo_por_isbn:
-            raise ValueError(f"Ya existe un libro con ISBN {libro.isbn}.")
-        self.catalogo_por_isbn[libro.isbn] = libro
+        with self._candado_libro(libro.isbn):
+            if libro.isbn in self.catalogo_por_isbn:
+                raise ValueError(f"Ya existe un libro con ISBN {libro.isbn}.")
+            with self._candado_indices:
+                self.catalogo_por_isbn[libro.isbn] = libro
+                self.motor_busqueda.indexar(libro)
+
+    def anadir_libros_en_lote(self, libros: Iterable[Libro]) -> Tuple[List[Libro], List[Libro]]:
+        """
+        Inserta muchos libros sin lanzar excepción en el primer duplicado.
+        Los índices se actualizan una sola vez al final, no por cada libro.
+        Devuelve (añadidos, duplicados).
+        """
+        anadidos: List[Libro] = []
+        duplicados: List[Libro] = []
+        for libro in libros:
+            with self._candado_libro(libro.isbn):
+                if libro.isbn in self.catalogo_por_isbn:
+                    duplicados.append(libro)
+                    continue
+                with self._candado_indices:
+                    self.catalogo_por_isbn[libro.isbn] = libro
+            anadidos.append(libro)
+        with self._candado_indices:
+            self.motor_busqueda.indexar_todos(anadidos)
+        return anadidos, duplicados
+
+    def importar_catalogo(self, ruta: str, procesos: Optional[int] = None) -> ResultadoImportacion:
+        """
+        Importa un volcado CSV/JSONL (campos: titulo, autor, categoria, isbn).
+        Los ISBN se validan en paralelo y se guardan normalizados a ISBN-13.
+        Se rechazan filas inválidas, ISBN repetidos en el archivo y los que ya están en el catálogo.
+        """
+        resultado = ResultadoImportacion()
+        nuevos: List[Libro] = []
+        vistos: Set[str] = set()
+        lineas: Dict[str, int] = {}
+        for validas, rechazadas in validar_en_paralelo(leer_filas(ruta), procesos):
+            resultado.rechazadas.extend(rechazadas)
+            for linea, titulo, autor, categoria, isbn in validas:
+                if isbn in vistos:
+                    resultado.rechazadas.append((linea, f"ISBN {isbn} repetido en el archivo."))
+                    continue
+                if isbn in self.catalogo_por_isbn:
+                    resultado.rechazadas.append((linea, f"Ya existe un libro con ISBN {isbn}."))
+                    continue
+                vistos.add(isbn)
+                lineas[isbn] = linea
+                nuevos.append(Libro(titulo, autor, categoria, isbn))
+
+        anadidos, duplicados = self.anadir_libros_en_lote(nuevos)
+        # Duplicados que otro hilo añadió mientras se leía el archivo
+        resultado.rechazadas.extend((lineas[l.isbn], f"Ya existe un libro con ISBN {l.isbn}.") for l in duplicados)
+        resultado.rechazadas.sort()
+        resultado.importados = len(anadidos)
+        return resultado
 
     def quitar_libro(self, isbn: str) -> None:
-        if isbn not in self.catalogo_por_isbn:
-            raise KeyError(f"No existe el libro con ISBN {isbn}.")
-        if isbn in self.prestamos:
-            raise ValueError("No se puede quitar un libro que está prestado.")
-        del self.catalogo_por_isbn[isbn]
+        isbn = clave_isbn(isbn)
+        with self._candado_libro(isbn):
+            if isbn not in self.catalogo_por_isbn:
+                raise KeyError(f"No existe el libro con ISBN {isbn}.")
+            if isbn in self.prestamos:
+                raise ValueError("No se puede quitar un libro que está prestado.")
+            # Primero se desindexa: una búsqueda nunca devuelve un ISBN ausente del catálogo
+            libro = self.catalogo_por_isbn[isbn]
+            with self._candado_indices:
+                self.motor_busqueda.desindexar(libro)
+                del self.catalogo_por_isbn[isbn]
 
     # ------------------------
     # Gestión de usuarios
     # ------------------------
     def registrar_usuario(self, nombre: str, user_id: str) -> Usuario:
         user_id = str(user_id).strip()
-        if user_id in self.ids_usuarios:
-            raise ValueError(f"El ID de usuario '{user_id}' ya está registrado.")
-        usuario = Usuario(nombre, user_id)
-        self.usuarios_por_id[user_id] = usuario
-        self.ids_usuarios.add(user_id)
-        return usuario
+        with self._candado_usuario(user_id):
+            if user_id in self.ids_usuarios:
+                raise ValueError(f"El ID de usuario '{user_id}' ya está registrado.")
+            usuario = Usuario(nombre, user_id)
+            self.usuarios_por_id[user_id] = usuario
+            self.ids_usuarios.add(user_id)
+            return usuario
 
     def baja_usuario(self, user_id: str) -> None:
-        if user_id not in self.usuarios_por_id:
-            raise KeyError(f"No existe el usuario con ID '{user_id}'.")
-        usuario = self.usuarios_por_id[user_id]
-        if usuario.libros_prestados:
-            raise ValueError("El usuario tiene préstamos activos. Debe devolverlos antes de la baja.")
-        del self.usuarios_por_id[user_id]
-        self.ids_usuarios.remove(user_id)
+        with self._candado_usuario(user_id):
+            if user_id not in self.usuarios_por_id:
+                raise KeyError(f"No existe el usuario con ID '{user_id}'.")
+            usuario = self.usuarios_por_id[user_id]
+            if usuario.libros_prestados:
+                raise ValueError("El usuario tiene préstamos activos. Debe devolverlos antes de la baja.")
+            del self.usuarios_por_id[user_id]
+            self.ids_usuarios.remove(user_id)
 
     # ------------------------
     # Préstamos
     # ------------------------
-    def prestar_libro(self, isbn: str, user_id: str) -> None:
-        if isbn not in self.catalogo_por_isbn:
-            raise KeyError(f"No existe el libro con ISBN {isbn}.")
-        if user_id not in self.usuarios_por_id:
-            raise KeyError(f"No existe el usuario con ID '{user_id}'.")
-        if isbn in self.prestamos:
-            raise ValueError(f"El libro {isbn} ya está prestado al usuario '{self.prestamos[isbn]}'.")
-
-        usuario = self.usuarios_por_id[user_id]
-        usuario.tomar_prestado(isbn)
-        self.prestamos[isbn] = user_id
-
-    def devolver_libro(self, isbn: str, user_id: Optional[str] = None) -> None:
-        if isbn not in self.prestamos:
-            raise ValueError(f"El libro {isbn} no está registrado como prestado.")
-
-        actual_uid = self.prestamos[isbn]
-        if user_id is not None and user_id != actual_uid:
-            raise ValueError(f"El libro {isbn} está registrado a nombre de '{actual_uid}', no de '{user_id}'.")
-
-        usuario = self.usuarios_por_id[actual_uid]
-        usuario.devolver(isbn)
-        del self.prestamos[isbn]
+    def prestar_libro(self, isbn: str, user_id: str, fecha: Optional[dt.date] = None,
+                      dias: int = DIAS_PRESTAMO) -> RegistroPrestamo:
+        if dias < 0:
+            raise ValueError("El plazo del préstamo no puede ser negativo.")
+        fecha = fecha or dt.date.today()
+        isbn = clave_isbn(isbn)
+
+        # Comprobación y asignación atómicas respecto a otros hilos (libro -> usuario)
+        with self._candado_libro(isbn), self._candado_usuario(user_id):
+            if isbn not in self.catalogo_por_isbn:
+                raise KeyError(f"No existe el libro con ISBN {isbn}.")
+            if user_id not in self.usuarios_por_id:
+                raise KeyError(f"No existe el usuario con ID '{user_id}'.")
+            if isbn in self.prestamos:
+                raise ValueError(f"El libro {isbn} ya está prestado al usuario '{self.prestamos[isbn]}'.")
+
+            registro = RegistroPrestamo(isbn, user_id, fecha, fecha + dt.timedelta(days=dias))
+
+            usuario = self.usuarios_por_id[user_id]
+            usuario.tomar_prestado(isbn)
+            self.prestamos[isbn] = user_id
+            with self._candado_indices:
+                self.registros_prestamo[isbn] = registro
+                self._indexar_vencimiento(registro)
+            return registro
+
+    def devolver_libro(self, isbn: str, user_id: Optional[str] = None,
+                       fecha: Optional[dt.date] = None) -> RegistroPrestamo:
+        isbn = clave_isbn(isbn)
+        # Con el candado del libro tomado nadie más puede cambiar prestamos[isbn]
+        with self._candado_libro(isbn):
+            if isbn not in self.prestamos:
+                raise ValueError(f"El libro {isbn} no está registrado como prestado.")
+
+            actual_uid = self.prestamos[isbn]
+            if user_id is not None and user_id != actual_uid:
+                raise ValueError(f"El libro {isbn} está registrado a nombre de '{actual_uid}', no de '{user_id}'.")
+
+            with self._candado_usuario(actual_uid):
+                usuario = self.usuarios_por_id[actual_uid]
+                usuario.devolver(isbn)
+                del self.prestamos[isbn]
+
+            with self._candado_indices:
+                registro = self.registros_prestamo.pop(isbn)
+                self._desindexar_vencimiento(registro)
+                registro.fecha_devolucion = fecha or dt.date.today()
+                self.historial.archivar(registro)
+            return registro
+
+    # ------------------------
+    # Vencimientos
+    # ------------------------
+    def _indexar_vencimiento(self, registro: RegistroPrestamo) -> None:
+        dia = registro.fecha_vencimiento
+        isbns = self._vencen_por_dia.get(dia)
+        if isbns is None:
+            isbns = self._vencen_por_dia[dia] = set()
+            insort(self._dias_vencimiento, dia)
+        isbns.add(registro.isbn)
+
+    def _desindexar_vencimiento(self, registro: RegistroPrestamo) -> None:
+        dia = registro.fecha_vencimiento
+        isbns = self._vencen_por_dia[dia]
+        isbns.discard(registro.isbn)
+        if not isbns:
+            # El día queda vacío: se quita también de la lista ordenada
+            del self._vencen_por_dia[dia]
+            del self._dias_vencimiento[bisect_left(self._dias_vencimiento, dia)]
+
+    def _prestamos_entre(self, desde: Optional[dt.date], hasta: dt.date,
+                         incluir_hasta: bool) -> List[RegistroPrestamo]:
+        resultado: List[RegistroPrestamo] = []
+        with self._candado_indices:
+            dias = self._dias_vencimiento
+            i = 0 if desde is None else bisect_left(dias, desde)
+            j = bisect_right(dias, hasta) if incluir_hasta else bisect_left(dias, hasta)
+            for dia in dias[i:j]:
+                resultado.extend(self.registros_prestamo[isbn] for isbn in self._vencen_por_dia[dia])
+        return resultado
+
+    def prestamos_vencidos(self, al: Optional[dt.date] = None) -> List[RegistroPrestamo]:
+        """Préstamos activos cuyo vencimiento es anterior a 'al' (hoy por defecto), del más antiguo al más reciente."""
+        return self._prestamos_entre(None, al or dt.date.today(), incluir_hasta=False)
+
+    def prestamos_por_vencer(self, dias: int, desde: Optional[dt.date] = None) -> List[RegistroPrestamo]:
+        """Préstamos activos que vencen entre 'desde' (hoy por defecto) y 'desde + dias', ambos inclusive."""
+        if dias < 0:
+            raise ValueError("El número de días no puede ser negativo.")
+        desde = desde or dt.date.today()
+        return self._prestamos_entre(desde, desde + dt.timedelta(days=dias), incluir_hasta=True)
 
     # ------------------------
     # Búsquedas
     # ------------------------
+    def buscar(self, consulta: str, k: int = 10) -> List[Libro]:
+        """Los k libros más relevantes para la consulta (título y autor, sin importar tildes)."""
+        with self._candado_indices:
+            resultados = self.motor_busqueda.buscar(consulta, k)
+            # Se resuelven dentro del candado; un libro quitado entretanto se omite
+            libros = [self.catalogo_por_isbn.get(isbn) for _, isbn in resultados]
+        return [libro for libro in libros if libro is not None]
+
+    def _libros(self) -> List[Libro]:
+        """Copia de los libros del catálogo: se puede recorrer aunque otros hilos añadan o quiten libros."""
+        with self._candado_indices:
+            return list(self.catalogo_por_isbn.values())
+
     def buscar_por_titulo(self, texto: str) -> List[Libro]:
         texto = texto.strip().lower()
-        return [l for l in self.catalogo_por_isbn.values() if texto in l.titulo.lower()]
+        return [l for l in self._libros() if texto in l.titulo.lower()]
 
     def buscar_por_autor(self, texto: str) -> List[Libro]:
         texto = texto.strip().lower()
-        return [l for l in self.catalogo_por_isbn.values() if texto in l.autor.lower()]
+        return [l for l in self._libros() if texto in l.autor.lower()]
 
     def buscar_por_categoria(self, categoria: str) -> List[Libro]:
-        categoria = categoria.strip().lower()
-        return [l for l in self.catalogo_por_isbn.values() if l.categoria.lower() == categoria]
+        # Se comparan IDs enteros en lugar de pasar cada categoría a minúsculas
+        ids = Libro.CATEGORIAS.ids_sin_mayusculas(categoria.strip())
+        if not ids:
+            return []
+        if len(ids) == 1:
+            (cat_id,) = ids
+            return [l for l in self._libros() if l.categoria_id == cat_id]
+        return [l for l in self._libros() if l.categoria_id in ids]
 
     # ------------------------
     # Listados
     # ------------------------
     def listar_libros_prestados_de_usuario(self, user_id: str) -> List[Libro]:
-        if user_id not in self.usuarios_por_id:
-            raise KeyError(f"No existe el usuario con ID '{user_id}'.")
-        usuario = self.usuarios_por_id[user_id]
-        return [self.catalogo_por_isbn[isbn] for isbn in usuario.libros_prestados]
+        with self._candado_usuario(user_id):
+            if user_id not in self.usuarios_por_id:
+                raise KeyError(f"No existe el usuario con ID '{user_id}'.")
+            isbns = list(self.usuarios_por_id[user_id].libros_prestados)
+        # Un libro devuelto y quitado del catálogo entretanto se omite
+        libros = [self.catalogo_por_isbn.get(isbn) for isbn in isbns]
+        return [libro for libro in libros if libro is not None]
 
     def listar_disponibles(self) -> Iterable[Libro]:
         """Devuelve un iterable de libros que NO están prestados."""
-        for isbn, libro in self.catalogo_por_isbn.items():
-            if isbn not in self.prestamos:
+        for libro in self._libros():
+            if libro.isbn not in self.prestamos:
                 yield libro
 
     def esta_disponible(self, isbn: str) -> bool:
+        isbn = clave_isbn(isbn)
         return (isbn in self.catalogo_por_isbn) and (isbn not in self.prestamos)
 
 
+# ------------------------------------------------------------
+# Prueba de estrés concurrente (ejecutar con --estres)
+# ------------------------------------------------------------
+def _ejecutar_carga_concurrente(concurrencia: Optional[str], hilos: int, operaciones_por_hilo: int,
+                                n_libros: int, n_usuarios: int, consultas: float = 0.1
+                                ) -> Tuple[Biblioteca, float, Dict[str, int], Dict[str, int], List[str]]:
+    """
+    Varios "mostradores" (hilos) prestan y devuelven libros al azar sobre la misma Biblioteca;
+    la fracción 'consultas' de las operaciones son consultas de vencimientos, que recorren
+    los índices mientras otros hilos los modifican.
+    Devuelve la biblioteca, el tiempo empleado, cuántos préstamos/devoluciones exitosos hubo
+    por ISBN y los errores inesperados de las consultas.
+    """
+    biblio = Biblioteca(concurrencia=concurrencia)
+    isbns = [f"978{i:010d}" for i in range(n_libros)]
+    user_ids = [f"U{i:04d}" for i in range(n_usuarios)]
+    for i, isbn in enumerate(isbns):
+        biblio.anadir_libro(Libro(f"Libro {i}", f"Autor {i % 97}", "Prueba", isbn))
+    for i, uid in enumerate(user_ids):
+        biblio.registrar_usuario(f"Usuario {i}", uid)
+
+    # Cada hilo cuenta en sus propios diccionarios; se suman al final
+    conteos: List[Tuple[Dict[str, int], Dict[str, int]]] = []
+    errores_consulta: List[str] = []
+    barrera = threading.Barrier(hilos)
+
+    def mostrador(semilla: int) -> None:
+        rnd = random.Random(semilla)
+        prestados: Dict[str, int] = {}
+        devueltos: Dict[str, int] = {}
+        conteos.append((prestados, devueltos))
+        barrera.wait()
+        for _ in range(operaciones_por_hilo):
+            isbn = rnd.choice(isbns)
+            azar = rnd.random()
+            if azar < consultas:
+                try:
+                    biblio.prestamos_por_vencer(DIAS_PRESTAMO)
+                except Exception as e:  # ninguna consulta debería fallar
+                    errores_consulta.append(f"{type(e).__name__}: {e}")
+                continue
+            try:
+                if azar < consultas + (1 - consultas) / 2:
+                    biblio.prestar_libro(isbn, rnd.choice(user_ids))
+                    prestados[isbn] = prestados.get(isbn, 0) + 1
+                else:
+                    biblio.devolver_libro(isbn)
+                    devueltos[isbn] = devueltos.get(isbn, 0) + 1
+            except (KeyError, ValueError):
+                pass  # libro ya prestado / no prestado: rechazo normal
+
+    intervalo_original = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # cambios de hilo muy frecuentes para provocar carreras
+    try:
+        trabajadores = [threading.Thread(target=mostrador, args=(semilla,)) for semilla in range(hilos)]
+        inicio = time.perf_counter()
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+        segundos = time.perf_counter() - inicio
+    finally:
+        sys.setswitchinterval(intervalo_original)
+
+    total_prestados: Dict[str, int] = {}
+    total_devueltos: Dict[str, int] = {}
+    for prestados, devueltos in conteos:
+        for isbn, n in prestados.items():
+            total_prestados[isbn] = total_prestados.get(isbn, 0) + n
+        for isbn, n in devueltos.items():
+            total_devueltos[isbn] = total_devueltos.get(isbn, 0) + n
+    return biblio, segundos, total_prestados, total_devueltos, errores_consulta
+
+
+def _verificar_prestamos(biblio: Biblioteca, prestados: Dict[str, int], devueltos: Dict[str, int]) -> List[str]:
+    """Comprueba que ningún libro se prestó dos veces y que todas las estructuras coinciden."""
+    errores: List[str] = []
+    titulares: Dict[str, List[str]] = {}
+    for uid, usuario in biblio.usuarios_por_id.items():
+        for isbn in usuario.libros_prestados:
+            titulares.setdefault(isbn, []).append(uid)
+
+    for isbn in biblio.catalogo_por_isbn:
+        activos = prestados.get(isbn, 0) - devueltos.get(isbn, 0)
+        esperado = 1 if isbn in biblio.prestamos else 0
+        if activos != esperado:
+            errores.append(f"{isbn}: {activos} préstamos activos según los mostradores, {esperado} según la biblioteca")
+        duenos = titulares.get(isbn, [])
+        if len(duenos) > 1:
+            errores.append(f"{isbn}: prestado a la vez a {duenos}")
+        elif duenos and biblio.prestamos.get(isbn) != duenos[0]:
+            errores.append(f"{isbn}: el usuario {duenos[0]} lo tiene pero el préstamo figura a otro nombre")
+
+    if set(biblio.registros_prestamo) != set(biblio.prestamos):
+        errores.append("registros_prestamo no coincide con prestamos")
+    if len(biblio.historial) != sum(devueltos.values()):
+        errores.append("el historial no contiene todas las devoluciones")
+    return errores
+
+
+def prueba_estres_concurrente(concurrencia: Optional[str] = "franjas", hilos: int = 8,
+                              operaciones_por_hilo: int = 20_000) -> bool:
+    biblio, segundos, prestados, devueltos, errores_consulta = _ejecutar_carga_concurrente(
+        concurrencia, hilos, operaciones_por_hilo, n_libros=200, n_usuarios=50)
+    errores = _verificar_prestamos(biblio, prestados, devueltos) + errores_consulta
+    print(f"[{concurrencia}] {hilos} hilos x {operaciones_por_hilo} ops en {segundos:.2f}s, "
+          f"préstamos={sum(prestados.values())}, inconsistencias={len(errores)}")
+    for error in errores[:5]:
+        print("   ", error)
+    return not errores
+
+
+def prueba_consultas_concurrentes(concurrencia: Optional[str] = "franjas", consultas: int = 300) -> bool:
+    """
+    Un hilo añade y quita libros mientras otro presta/devuelve y dos más recorren el
+    catálogo con las consultas de búsqueda y listado. Ninguna consulta debe fallar.
+    """
+    biblio = Biblioteca(concurrencia=concurrencia)
+    isbns = [f"978{i:010d}" for i in range(2_000)]
+    for i, isbn in enumerate(isbns[:1_000]):
+        biblio.anadir_libro(Libro(f"Libro {i}", f"Autor {i % 97}", "Prueba", isbn))
+    user_ids = [f"U{i:03d}" for i in range(20)]
+    for uid in user_ids:
+        biblio.registrar_usuario(f"Usuario {uid}", uid)
+    terminado = threading.Event()
+    errores: List[str] = []
+
+    def altas_y_bajas() -> None:
+        rnd = random.Random(1)
+        while not terminado.is_set():
+            isbn = rnd.choice(isbns)
+            try:
+                if rnd.random() < 0.5:
+                    biblio.anadir_libro(Libro(f"Libro {isbn}", "Autor nuevo", "Prueba", isbn))
+                else:
+                    biblio.quitar_libro(isbn)
+            except (KeyError, ValueError):
+                pass
+
+    def prestamos() -> None:
+        rnd = random.Random(2)
+        while not terminado.is_set():
+            try:
+                if rnd.random() < 0.5:
+                    biblio.prestar_libro(rnd.choice(isbns), rnd.choice(user_ids))
+                else:
+                    biblio.devolver_libro(rnd.choice(isbns))
+            except (KeyError, ValueError):
+                pass
+
+    def consultar(semilla: int) -> None:
+        rnd = random.Random(semilla)
+        for _ in range(consultas):
+            try:
+                rnd.choice((
+                    lambda: biblio.buscar_por_titulo("libro 1"),
+                    lambda: biblio.buscar_por_autor("autor"),
+                    lambda: biblio.buscar_por_categoria("prueba"),
+                    lambda: list(biblio.listar_disponibles()),
+                    lambda: biblio.listar_libros_prestados_de_usuario(rnd.choice(user_ids)),
+                ))()
+            except Exception as e:  # ninguna consulta debería fallar
+                errores.append(f"{type(e).__name__}: {e}")
+
+    intervalo_original = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        escritores = [threading.Thread(target=altas_y_bajas), threading.Thread(target=prestamos)]
+        lectores = [threading.Thread(target=consultar, args=(semilla,)) for semilla in (3, 4)]
+        for t in escritores + lectores:
+            t.start()
+        for t in lectores:
+            t.join()
+        terminado.set()
+        for t in escritores:
+            t.join()
+    finally:
+        sys.setswitchinterval(intervalo_original)
+    print(f"[{concurrencia}] {2 * consultas} consultas con altas/bajas concurrentes, errores={len(errores)}")
+    for error in errores[:5]:
+        print("   ", error)
+    return not errores
+
+
+def comparar_rendimiento_bloqueos(hilos: int = 8, operaciones_por_hilo: int = 20_000) -> Dict[str, float]:
+    """
+    Operaciones por segundo con un candado global frente a candados por franjas.
+
+    Con el GIL sólo un hilo ejecuta Python a la vez, así que las franjas no aportan
+    paralelismo y cuestan un candado más por operación: en las mediciones hechas el
+    modo "global" fue igual o algo más rápido (hasta un 10 % según la ejecución). Las
+    franjas sólo compensan si las operaciones esperan fuera del GIL (E/S, disco).
+    """
+    resultados: Dict[str, float] = {}
+    for modo in ("global", "franjas"):
+        _, segundos, _, _, _ = _ejecutar_carga_concurrente(
+            modo, hilos, operaciones_por_hilo, n_libros=10_000, n_usuarios=1_000, consultas=0.0)
+        resultados[modo] = hilos * operaciones_por_hilo / segundos
+        print(f"{modo:>8}: {resultados[modo]:,.0f} ops/s")
+    return resultados
+
+
+# ------------------------------------------------------------
+# Medición de la búsqueda por relevancia (ejecutar con --bench-busqueda)
+# ------------------------------------------------------------
+def medir_busqueda(n_libros: int = 1_000_000, repeticiones: int = 200) -> Dict[str, float]:
+    """Indexa un catálogo sintético y mide la latencia media (ms) de varias consultas."""
+    rnd = random.Random(42)
+    vocabulario = [f"palabra{i}" for i in range(20_000)]
+    autores = [f"Nombre{i} Apellido{i % 3_000}" for i in range(30_000)]
+    biblio = Biblioteca()
+    inicio = time.perf_counter()
+    for i in range(n_libros):
+        titulo = " ".join(rnd.choices(vocabulario, k=rnd.randint(2, 6)))
+        biblio.anadir_libro(Libro(titulo, rnd.choice(autores), "Prueba", f"{i:013d}"))
+    print(f"Indexados {n_libros:,} libros en {time.perf_counter() - inicio:.1f}s")
+
+    consultas = {
+        "término raro": "palabra19999",
+        "título + autor": "palabra10 palabra250 apellido7",
+        "autor": "nombre123 apellido123",
+    }
+    resultados: Dict[str, float] = {}
+    for nombre, consulta in consultas.items():
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            biblio.buscar(consulta, k=10)
+        resultados[nombre] = (time.perf_counter() - inicio) * 1000 / repeticiones
+        print(f"{nombre:>15}: {resultados[nombre]:.2f} ms")
+    return resultados
+
+
+# ------------------------------------------------------------
+# Medición de memoria del interning (ejecutar con --memoria)
+# ------------------------------------------------------------
+class _LibroSinInterning:
+    """Representación anterior de Libro (cadenas propias por libro), sólo para comparar."""
+    __slots__ = ("_titulo_autor", "categoria", "isbn")
+
+    def __init__(self, titulo: str, autor: str, categoria: str, isbn: str) -> None:
+        self._titulo_autor = (titulo.strip(), autor.strip())
+        self.categoria = categoria.strip()
+        self.isbn = str(isbn).strip()
+
+
+def medir_memoria_interning(n_libros: int = 300_000, n_autores: int = 20_000,
+                            n_categorias: int = 300) -> Dict[str, float]:
+    """
+    Compara la memoria de n_libros con y sin interning, y el tiempo de buscar_por_categoria
+    (comparación de enteros) frente al filtrado anterior (lower() de cada categoría).
+    Las cadenas se crean de nuevo para cada fila, como ocurre al leer un CSV.
+    """
+    rnd = random.Random(7)
+    filas = [(f"Título {i}", rnd.randrange(n_autores), rnd.randrange(n_categorias), f"{i:013d}")
+             for i in range(n_libros)]
+
+    def construir(clase) -> Tuple[list, float]:
+        tracemalloc.start()
+        libros = [clase(titulo, f"Autor número {a}", f"Categoría {c}", isbn) for titulo, a, c, isbn in filas]
+        usado = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return libros, usado / 1e6
+
+    viejos, mb_antes = construir(_LibroSinInterning)
+    nuevos, mb_despues = construir(Libro)
+    print(f"Memoria de {n_libros:,} libros: {mb_antes:.1f} MB sin interning, {mb_despues:.1f} MB con interning "
+          f"({100 * (1 - mb_despues / mb_antes):.0f}% menos)")
+
+    biblio = Biblioteca()
+    biblio.catalogo_por_isbn = {l.isbn: l for l in nuevos}  # sin indexar: sólo se mide el filtrado
+    buscada = "categoría 42"
+    inicio = time.perf_counter()
+    antes = [l for l in viejos if l.categoria.lower() == buscada]
+    ms_antes = (time.perf_counter() - inicio) * 1000
+    inicio = time.perf_counter()
+    despues = biblio.buscar_por_categoria(buscada)
+    ms_despues = (time.perf_counter() - inicio) * 1000
+    assert len(antes) == len(despues)
+    print(f"buscar_por_categoria: {ms_antes:.1f} ms comparando cadenas, {ms_despues:.1f} ms comparando IDs")
+    return {"mb_antes": mb_antes, "mb_despues": mb_despues, "ms_antes": ms_antes, "ms_despues": ms_despues}
+
+
+# ------------------------------------------------------------
+# Prueba de ISBN duplicados al importar (ejecutar con --prueba-isbn)
+# ------------------------------------------------------------
+def prueba_importacion_isbn_duplicados() -> bool:
+    """
+    Un catálogo con el ISBN escrito con guiones no debe aceptar, al importar, el mismo
+    libro escrito como ISBN-13 sin guiones ni como ISBN-10.
+    """
+    biblio = Biblioteca()
+    biblio.anadir_libro(Libro("Clean Code", "Robert C. Martin", "Programación", "978-0-13-235088-4"))
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as f:
+        f.write("titulo,autor,categoria,isbn\n"
+                "Clean Code,Robert C. Martin,Programación,9780132350884\n"
+                "Clean Code,Robert C. Martin,Programación,0-13-235088-2\n"
+                "Design Patterns,Erich Gamma,Programación,978-0-201-63361-0\n")
+        ruta = f.name
+    try:
+        resultado = biblio.importar_catalogo(ruta, procesos=1)
+    finally:
+        os.remove(ruta)
+
+    errores: List[str] = []
+    if resultado.importados != 1 or [linea for linea, _ in resultado.rechazadas] != [2, 3]:
+        errores.append(f"se esperaba 1 importado y las líneas 2 y 3 rechazadas: {resultado}, {resultado.rechazadas}")
+    if sorted(biblio.catalogo_por_isbn) != ["9780132350884", "9780201633610"]:
+        errores.append(f"claves del catálogo inesperadas: {sorted(biblio.catalogo_por_isbn)}")
+    biblio.registrar_usuario("Ana López", "U002")
+    biblio.prestar_libro("0-13-235088-2", "U002")  # cualquier forma del ISBN encuentra el libro
+    if biblio.esta_disponible("978-0-13-235088-4"):
+        errores.append("el préstamo no se registró bajo la clave normalizada")
+    for error in errores:
+        print("   ", error)
+    print(f"Importación con ISBN duplicados en otra forma: {'OK' if not errores else 'FALLA'}")
+    return not errores
+
+
 # ------------------------------------------------------------
 # Pruebas rápidas (ejecutar este archivo directamente)
 # ------------------------------------------------------------
 if __name__ == "__main__":
+    if "--estres" in sys.argv:
+        ok = prueba_estres_concurrente("franjas") and prueba_estres_concurrente("global")
+        ok = prueba_consultas_concurrentes("franjas") and prueba_consultas_concurrentes("global") and ok
+        prueba_estres_concurrente(None)  # sin candados: puede mostrar dobles préstamos
+        comparar_rendimiento_bloqueos()
+        sys.exit(0 if ok else 1)
+    if "--memoria" in sys.argv:
+        medir_memoria_interning()
+        sys.exit(0)
+    if "--prueba-isbn" in sys.argv:
+        sys.exit(0 if prueba_importacion_isbn_duplicados() else 1)
+    if "--bench-busqueda" in sys.argv:
+        medir_busqueda()
+        sys.exit(0)
+
     # 1) Crear biblioteca
     biblio = Biblioteca()
 
@@ -212,6 +931,7 @@ if __name__ == "__main__":
     print("Buscar por título 'clean':", biblio.buscar_por_titulo("clean"))
     print("Buscar por autor 'gamma':", biblio.buscar_por_autor("gamma"))
     print("Buscar por categoría 'programación':", biblio.buscar_por_categoria("programación"))
+    print("Mejor coincidencia 'garcia marquez soledad':", biblio.buscar("garcia marquez soledad", k=1))
 
     # 5) Prestar libros
     biblio.prestar_libro("9780132350884", "U001")  # Clean Code a Paul
@@ -225,6 +945,14 @@ if __name__ == "__main__":
     biblio.devolver_libro("9780201633610")  # Ana devuelve
     print("Disponibles tras devolución:", list(biblio.listar_disponibles()))
 
+    # 6b) Vencimientos e historial
+    hace_un_mes = dt.date.today() - dt.timedelta(days=30)
+    biblio.prestar_libro("9780307474728", "U002", fecha=hace_un_mes)  # préstamo ya vencido
+    print("Vencidos hoy:", biblio.prestamos_vencidos())
+    print("Vencen en los próximos 14 días:", biblio.prestamos_por_vencer(14))
+    biblio.devolver_libro("9780307474728")
+    print("Historial de U002:", biblio.historial.de_usuario("U002"))
+
     # 7) Intentar baja de usuario con libros
     try:
         biblio.baja_usuario("U001")  # Paul aún tiene un libro -> error esperado
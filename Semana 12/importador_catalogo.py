@@ -0,0 +1,176 @@
+"""
+Importación masiva de catálogos para la Biblioteca.
+
+- Lee CSV (con encabezado) o JSONL (un objeto JSON por línea) en streaming.
+- Normaliza y valida ISBNs (ISBN-10 o ISBN-13, con dígito de control) en un
+  pool de procesos, por lotes, sin cargar el archivo completo en memoria.
+- Cada fila inválida se reporta con su número de línea y el motivo.
+
+Campos esperados por fila: titulo, autor, categoria, isbn.
+"""
+from __future__ import annotations
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CAMPOS = ("titulo", "autor", "categoria", "isbn")
+TAMANO_LOTE = 5_000
+
+# (línea, datos de la fila o None si no se pudo leer, error de lectura)
+FilaLeida = Tuple[int, Optional[Dict[str, str]], str]
+# (línea, titulo, autor, categoria, isbn normalizado)
+FilaValida = Tuple[int, str, str, str, str]
+# (línea, motivo)
+FilaRechazada = Tuple[int, str]
+
+
+@dataclass
+class ResultadoImportacion:
+    """Resumen de una importación: cuántos libros entraron y qué filas se rechazaron."""
+    importados: int = 0
+    rechazadas: List[FilaRechazada] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return f"Importados: {self.importados}, rechazados: {len(self.rechazadas)}"
+
+
+# -----------------------------
+# ISBN
+# -----------------------------
+def _control_isbn13(doce_digitos: str) -> str:
+    suma = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(doce_digitos))
+    return str((10 - suma % 10) % 10)
+
+
+def _isbn10_valido(isbn: str) -> bool:
+    if not (isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == "X")):
+        return False
+    suma = sum((10 - i) * int(d) for i, d in enumerate(isbn[:9]))
+    suma += 10 if isbn[9] == "X" else int(isbn[9])
+    return suma % 11 == 0
+
+
+def normalizar_isbn(texto: str) -> str:
+    """
+    Devuelve el ISBN-13 canónico (sólo dígitos) o lanza ValueError.
+    Acepta guiones/espacios y convierte ISBN-10 a ISBN-13 (prefijo 978).
+    """
+    isbn = "".join(c for c in str(texto) if c not in "- ").upper()
+    if len(isbn) == 10:
+        if not _isbn10_valido(isbn):
+            raise ValueError(f"ISBN-10 con dígito de control inválido: {texto!r}")
+        base = "978" + isbn[:9]
+        return base + _control_isbn13(base)
+    if len(isbn) == 13:
+        if not isbn.isdigit():
+            raise ValueError(f"ISBN-13 con caracteres no numéricos: {texto!r}")
+        if _control_isbn13(isbn[:12]) != isbn[12]:
+            raise ValueError(f"ISBN-13 con dígito de control inválido: {texto!r}")
+        return isbn
+    raise ValueError(f"Longitud de ISBN inválida ({len(isbn)}): {texto!r}")
+
+
+def clave_isbn(texto: str) -> str:
+    """
+    Forma única con la que el catálogo guarda y busca un ISBN: el ISBN-13 canónico
+    si es válido; si no, el código tal cual pero sin guiones ni espacios.
+    Así "978-0-13-235088-4", "9780132350884" y "0-13-235088-2" son la misma clave.
+    """
+    # Equivale a normalizar_isbn con respaldo, pero sin excepciones: se usa en cada préstamo
+    isbn = str(texto).replace("-", "").replace(" ", "").upper()
+    if len(isbn) == 10 and _isbn10_valido(isbn):
+        base = "978" + isbn[:9]
+        return base + _control_isbn13(base)
+    return isbn
+
+
+# -----------------------------
+# Lectura en streaming
+# -----------------------------
+def leer_filas(ruta: str) -> Iterator[FilaLeida]:
+    """Lee el archivo fila a fila según su extensión (.csv o .jsonl/.ndjson)."""
+    extension = os.path.splitext(ruta)[1].lower()
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        if extension == ".csv":
+            lector = csv.DictReader(f)
+            for fila in lector:
+                yield lector.line_num, fila, ""
+        elif extension in (".jsonl", ".ndjson"):
+            for linea, texto in enumerate(f, start=1):
+                if not texto.strip():
+                    continue
+                try:
+                    fila = json.loads(texto)
+                except json.JSONDecodeError as e:
+                    yield linea, None, f"JSON inválido: {e.msg}"
+                    continue
+                if isinstance(fila, dict):
+                    yield linea, fila, ""
+                else:
+                    yield linea, None, "Se esperaba un objeto JSON."
+        else:
+            raise ValueError(f"Formato no soportado: '{extension}' (use .csv o .jsonl).")
+
+
+# -----------------------------
+# Validación (se ejecuta en los procesos del pool)
+# -----------------------------
+def validar_lote(lote: List[FilaLeida]) -> Tuple[List[FilaValida], List[FilaRechazada]]:
+    validas: List[FilaValida] = []
+    rechazadas: List[FilaRechazada] = []
+    for linea, fila, error in lote:
+        if fila is None:
+            rechazadas.append((linea, error))
+            continue
+        valores = {campo: str(fila.get(campo) or "").strip() for campo in CAMPOS}
+        faltantes = [campo for campo, valor in valores.items() if not valor]
+        if faltantes:
+            rechazadas.append((linea, f"Campos vacíos: {', '.join(faltantes)}"))
+            continue
+        try:
+            isbn = normalizar_isbn(valores["isbn"])
+        except ValueError as e:
+            rechazadas.append((linea, str(e)))
+            continue
+        validas.append((linea, valores["titulo"], valores["autor"], valores["categoria"], isbn))
+    return validas, rechazadas
+
+
+def _lotes(filas: Iterable[FilaLeida], tamano: int) -> Iterator[List[FilaLeida]]:
+    lote: List[FilaLeida] = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def validar_en_paralelo(filas: Iterable[FilaLeida], procesos: Optional[int] = None,
+                        tamano_lote: int = TAMANO_LOTE
+                        ) -> Iterator[Tuple[List[FilaValida], List[FilaRechazada]]]:
+    """
+    Valida los lotes en un pool de procesos y los entrega EN ORDEN.
+    Sólo hay unos pocos lotes en vuelo a la vez, así la memoria no depende del tamaño del archivo.
+    Con procesos=1 se valida en el propio proceso (útil para archivos pequeños).
+    """
+    if procesos == 1:
+        for lote in _lotes(filas, tamano_lote):
+            yield validar_lote(lote)
+        return
+
+    procesos = procesos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        en_vuelo: Deque[Future] = deque()
+        limite = 2 * procesos
+        for lote in _lotes(filas, tamano_lote):
+            en_vuelo.append(pool.submit(validar_lote, lote))
+            if len(en_vuelo) >= limite:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
@@ -0,0 +1,144 @@
+"""
+Motor de búsqueda de texto completo para el catálogo de la Biblioteca.
+
+- Tokenización con plegado de acentos y minúsculas ("García" -> "garcia").
+- Índice invertido: {término: {doc_id: frecuencia}} (listas de postings).
+- Ranking BM25 sobre título + autor (el título pesa más).
+- Top-k con un heap (heapq.nlargest) en lugar de ordenar todos los resultados.
+- Actualización incremental: indexar()/desindexar() por libro.
+"""
+from __future__ import annotations
+import heapq
+import math
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Protocol, Tuple
+
+K1 = 1.2           # saturación de la frecuencia del término
+B = 0.75           # normalización por longitud del documento
+PESO_TITULO = 2    # cada aparición en el título cuenta como 2
+LIMITE_ACUMULADORES = 50_000  # a partir de aquí sólo se puntúan candidatos ya encontrados
+
+_PATRON_TOKEN = re.compile(r"\w+")
+
+
+class Documento(Protocol):
+    """Lo mínimo que el motor necesita de un libro."""
+    isbn: str
+    titulo: str
+    autor: str
+
+
+def plegar_acentos(texto: str) -> str:
+    """Quita tildes y diacríticos: 'Márquez' -> 'Marquez'."""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Divide en palabras normalizadas (sin acentos, en minúsculas)."""
+    return _PATRON_TOKEN.findall(plegar_acentos(texto).casefold())
+
+
+class MotorBusqueda:
+    """
+    Índice invertido con ranking BM25.
+
+    Internamente cada ISBN se traduce a un entero (doc_id) para que las listas
+    de postings ocupen menos; los doc_id liberados no se reutilizan.
+    """
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[int, int]] = {}  # término -> {doc_id: tf}
+        self._longitudes: Dict[int, int] = {}           # doc_id -> nº de tokens ponderados
+        self._doc_por_isbn: Dict[str, int] = {}
+        self._isbn_por_doc: Dict[int, str] = {}
+        self._siguiente_doc = 0
+        self._longitud_total = 0
+
+    def __len__(self) -> int:
+        return len(self._longitudes)
+
+    def __contains__(self, isbn: str) -> bool:
+        return isbn in self._doc_por_isbn
+
+    # ------------------------
+    # Indexación
+    # ------------------------
+    @staticmethod
+    def _frecuencias(doc: Documento) -> Dict[str, int]:
+        frecuencias: Dict[str, int] = {}
+        for termino in tokenizar(doc.titulo):
+            frecuencias[termino] = frecuencias.get(termino, 0) + PESO_TITULO
+        for termino in tokenizar(doc.autor):
+            frecuencias[termino] = frecuencias.get(termino, 0) + 1
+        return frecuencias
+
+    def indexar(self, doc: Documento) -> None:
+        if doc.isbn in self._doc_por_isbn:
+            raise ValueError(f"El ISBN {doc.isbn} ya está indexado.")
+        doc_id = self._siguiente_doc
+        self._siguiente_doc += 1
+        self._doc_por_isbn[doc.isbn] = doc_id
+        self._isbn_por_doc[doc_id] = doc.isbn
+
+        frecuencias = self._frecuencias(doc)
+        for termino, tf in frecuencias.items():
+            self._postings.setdefault(termino, {})[doc_id] = tf
+        longitud = sum(frecuencias.values())
+        self._longitudes[doc_id] = longitud
+        self._longitud_total += longitud
+
+    def indexar_todos(self, docs: Iterable[Documento]) -> None:
+        for doc in docs:
+            self.indexar(doc)
+
+    def desindexar(self, doc: Documento) -> None:
+        """Quita un libro del índice (se vuelve a tokenizar para saber qué postings tocar)."""
+        doc_id = self._doc_por_isbn.pop(doc.isbn, None)
+        if doc_id is None:
+            raise KeyError(f"El ISBN {doc.isbn} no está indexado.")
+        del self._isbn_por_doc[doc_id]
+        for termino in self._frecuencias(doc):
+            postings = self._postings[termino]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[termino]
+        self._longitud_total -= self._longitudes.pop(doc_id)
+
+    # ------------------------
+    # Consultas
+    # ------------------------
+    def buscar(self, consulta: str, k: int = 10) -> List[Tuple[float, str]]:
+        """
+        Devuelve hasta k pares (puntuación, isbn), del más relevante al menos relevante.
+
+        Los términos se procesan del más raro al más común. Cuando ya hay
+        LIMITE_ACUMULADORES candidatos, los términos restantes sólo suman a
+        candidatos existentes, así una palabra muy frecuente ("de", "la") no
+        obliga a recorrer medio catálogo.
+        """
+        n_docs = len(self._longitudes)
+        if k <= 0 or not n_docs:
+            return []
+        terminos = [t for t in set(tokenizar(consulta)) if t in self._postings]
+        if not terminos:
+            return []
+        terminos.sort(key=lambda t: len(self._postings[t]))
+
+        promedio = self._longitud_total / n_docs
+        longitudes = self._longitudes
+        acumuladores: Dict[int, float] = {}
+        for termino in terminos:
+            postings = self._postings[termino]
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            if len(acumuladores) < LIMITE_ACUMULADORES:
+                candidatos = postings.items()
+            else:
+                candidatos = ((d, postings[d]) for d in acumuladores if d in postings)
+            for doc_id, tf in candidatos:
+                norma = K1 * (1 - B + B * longitudes[doc_id] / promedio)
+                acumuladores[doc_id] = acumuladores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norma)
+
+        mejores = heapq.nlargest(k, acumuladores.items(), key=lambda par: par[1])
+        return [(puntuacion, self._isbn_por_doc[doc_id]) for doc_id, puntuacion in mejores]
@@ -1,14 +1,71 @@
+import os
+import queue
+import sys
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+
+# Utilidades compartidas (tramos de filas, vigilante de bloqueos)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+from tramos import tramos_consecutivos  # noqa: E402
+from vigilante_bucle import VigilanteBucleMixin, instalar_gancho  # noqa: E402
 
 
 APP_TITLE = "Gestor de Ítems — GUI Básica (Tkinter)"
 PAD = 10
 MIN_WIDTH = 520
 MIN_HEIGHT = 380
+IMPORT_CHUNK = 2_000  # líneas que la importación masiva entrega al Listbox por cada after()
+
+
+class ItemModel:
+    """
+    Modelo de la lista de ítems, separado del Listbox.
+    - Lista en orden de inserción: es lo que muestra el Listbox (mismos índices).
+    - Conjunto con los mismos textos: comprobar duplicados en O(1) en vez de recorrer la lista.
+    """
+
+    def __init__(self) -> None:
+        self._items: list[str] = []
+        self._present: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._present
 
+    def __getitem__(self, index: int) -> str:
+        return self._items[index]
 
-class App(ttk.Frame):
+    def add(self, text: str) -> bool:
+        """Agrega al final; devuelve False (sin agregar) si ya existía."""
+        if text in self._present:
+            return False
+        self._present.add(text)
+        self._items.append(text)
+        return True
+
+    def add_many(self, texts) -> list[str]:
+        """Agrega los textos que no existían; devuelve sólo los nuevos, en orden."""
+        new = [text for text in texts if text not in self._present]
+        self._present.update(new)
+        self._items.extend(new)
+        return new
+
+    def remove_range(self, first: int, last: int) -> None:
+        """Elimina los ítems de first a last (ambos incluidos), como Listbox.delete(first, last)."""
+        for text in self._items[first:last + 1]:
+            self._present.discard(text)
+        del self._items[first:last + 1]
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._present.clear()
+
+
+class App(VigilanteBucleMixin, ttk.Frame):
     """Contenedor principal de la aplicación."""
 
     def __init__(self, master: tk.Tk | tk.Toplevel):
@@ -16,9 +73,11 @@ class App(ttk.Frame):
         self.master: tk.Tk = master
 
         # Estado
-        self.items_var = tk.StringVar(value=[])  # fuente de datos para el Listbox
+        self.model = ItemModel()                 # fuente de datos para el Listbox
         self.input_var = tk.StringVar()          # texto del Entry
         self.status_var = tk.StringVar(value="Listo. Ingrese un texto y presione Agregar o Enter.")
+        self._import_queue: queue.Queue | None = None  # mensajes del hilo de importación en curso
+        self._import_after: str | None = None
 
         # Configuración raíz
         self.master.title(APP_TITLE)
@@ -44,9 +103,13 @@ class App(ttk.Frame):
         self.btn_add = ttk.Button(self, text="Agregar", command=self._on_add)
         self.btn_clear_selected = ttk.Button(self, text="Limpiar selección", command=self._on_clear_selected)
         self.btn_clear_all = ttk.Button(self, text="Limpiar todo", command=self._on_clear_all)
+        self.btn_paste = ttk.Button(self, text="Pegar lista", command=self._on_paste)
+        self.btn_import = ttk.Button(self, text="Importar archivo…", command=self._on_import_file)
 
         # Lista + Scrollbar
-        self.listbox = tk.Listbox(self, listvariable=self.items_var, height=10, activestyle="dotbox")
+        # Sin listvariable: cada cambio se aplica con un insert/delete puntual, sin
+        # volver a pasarle a Tk la lista completa
+        self.listbox = tk.Listbox(self, height=10, activestyle="dotbox")
         self.listbox.bind("<<ListboxSelect>>", self._on_select_change)
         self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.listbox.yview)
         self.listbox.config(yscrollcommand=self.scrollbar.set)
@@ -62,6 +125,8 @@ class App(ttk.Frame):
         self.entry_input.grid(row=2, column=1, columnspan=2, sticky="we")
 
         self.btn_add.grid(row=2, column=3, sticky="we", padx=(5, 0))
+        self.btn_paste.grid(row=3, column=0, sticky="we", pady=(5, 0))
+        self.btn_import.grid(row=3, column=1, sticky="w", padx=(5, 0), pady=(5, 0))
         self.btn_clear_selected.grid(row=3, column=2, sticky="we", pady=(5, 0))
         self.btn_clear_all.grid(row=3, column=3, sticky="we", pady=(5, 0))
 
@@ -91,28 +156,24 @@ class App(ttk.Frame):
             self._flash_entry_error("El campo está vacío. Escriba un texto para agregar.")
             return
         # Validación: evitar duplicados exactos (opcional, se puede quitar)
-        current = list(self.items_var.get())
-        if text in current:
+        if not self.model.add(text):
             self.status_var.set("El ítem ya existe en la lista.")
             return
-        current.append(text)
-        self.items_var.set(current)
+        self.listbox.insert(tk.END, text)
         self.input_var.set("")  # limpiar campo
         self.entry_input.focus_set()
-        self.status_var.set(f"Agregado: “{text}”. Total: {len(current)}")
+        self.status_var.set(f"Agregado: “{text}”. Total: {len(self.model)}")
 
     def _on_clear_selected(self) -> None:
         selection = list(self.listbox.curselection())
         if not selection:
             self.status_var.set("No hay selección para limpiar.")
             return
-        # Eliminar desde el final para no desplazar índices
-        for idx in reversed(selection):
-            self.listbox.delete(idx)
-        # Sincronizar el listvariable con el contenido actual
-        remaining = list(self.listbox.get(0, tk.END))
-        self.items_var.set(remaining)
-        self.status_var.set(f"Ítems eliminados: {len(selection)}. Total: {len(remaining)}")
+        # Eliminar por tramos consecutivos, desde el final para no desplazar índices
+        for first, last in tramos_consecutivos(selection):
+            self.listbox.delete(first, last)
+            self.model.remove_range(first, last)
+        self.status_var.set(f"Ítems eliminados: {len(selection)}. Total: {len(self.model)}")
 
     def _on_clear_all(self) -> None:
         if not self.listbox.size():
@@ -120,9 +181,107 @@ class App(ttk.Frame):
             return
         if messagebox.askyesno("Confirmación", "¿Desea eliminar todos los ítems?"):
             self.listbox.delete(0, tk.END)
-            self.items_var.set([])
+            self.model.clear()
             self.status_var.set("Lista vaciada.")
 
+    # ---------- Importación masiva ----------
+    def _on_paste(self) -> None:
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            self.status_var.set("El portapapeles está vacío o no contiene texto.")
+            return
+        self.start_import(text)
+
+    def _on_import_file(self) -> None:
+        path = filedialog.askopenfilename(title="Importar ítems (uno por línea)",
+                                          filetypes=[("Texto", "*.txt *.csv"), ("Todos", "*.*")])
+        if path:
+            self.start_import(path, from_file=True)
+
+    def start_import(self, source: str, from_file: bool = False) -> None:
+        """
+        Importa un ítem por línea desde un texto o un archivo.
+        La lectura y el análisis corren en un hilo; el Listbox recibe los ítems por
+        tramos de IMPORT_CHUNK, un tramo por vuelta del bucle de eventos.
+        """
+        if self._import_queue is not None:
+            self.status_var.set("Ya hay una importación en curso.")
+            return
+        self._import_queue = queue.Queue()
+        self._import_total = 0
+        self._import_added = 0
+        self._import_lines = 0
+        self.btn_paste.state(["disabled"])
+        self.btn_import.state(["disabled"])
+        self.status_var.set("Importando… leyendo datos.")
+        threading.Thread(target=self._parse_worker, args=(source, from_file, self._import_queue),
+                         daemon=True).start()
+        self._import_after = self.after(20, self._poll_import)
+
+    def _parse_worker(self, source: str, from_file: bool, out: queue.Queue) -> None:
+        """(Hilo) Divide en líneas, normaliza y quita vacíos y repetidos dentro de la propia entrada."""
+        try:
+            if from_file:
+                with open(source, "r", encoding="utf-8-sig") as f:
+                    source = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            out.put(("error", str(e)))
+            return
+        lines = source.splitlines()
+        out.put(("total", len(lines)))
+        seen: set[str] = set()
+        chunk: list[str] = []
+        for number, line in enumerate(lines, start=1):
+            text = self._normalize_text(line)
+            if text and text not in seen:
+                seen.add(text)
+                chunk.append(text)
+            if number % IMPORT_CHUNK == 0:
+                out.put(("chunk", chunk, number))
+                chunk = []
+        out.put(("chunk", chunk, len(lines)))
+        out.put(("done", len(lines)))
+
+    def _poll_import(self) -> None:
+        """(Hilo de Tk) Aplica un mensaje del hilo de importación y se vuelve a programar."""
+        try:
+            message = self._import_queue.get_nowait()
+        except queue.Empty:
+            self._import_after = self.after(20, self._poll_import)
+            return
+        kind = message[0]
+        if kind == "total":
+            self._import_total = message[1]
+        elif kind == "chunk":
+            # Duplicados frente a la lista actual: el conjunto del modelo, en O(1) por línea
+            new = self.model.add_many(message[1])
+            if new:
+                self.listbox.insert(tk.END, *new)
+            self._import_added += len(new)
+            self._import_lines = message[2]
+            percent = 100 * self._import_lines // max(1, self._import_total)
+            self.status_var.set(f"Importando… {percent}% ({self._import_lines:,} de {self._import_total:,} líneas, "
+                                f"{self._import_added:,} nuevas)")
+        else:
+            if kind == "error":
+                self.status_var.set(f"No se pudo importar: {message[1]}")
+            else:
+                skipped = message[1] - self._import_added
+                self.status_var.set(f"Importación terminada: {self._import_added:,} agregados, {skipped:,} "
+                                    f"vacíos o duplicados omitidos. Total: {len(self.model):,}")
+            self._import_queue = None
+            self._import_after = None
+            self.btn_paste.state(["!disabled"])
+            self.btn_import.state(["!disabled"])
+            return
+        self._import_after = self.after(1, self._poll_import)
+
+    def destroy(self) -> None:
+        if self._import_after is not None:
+            self.after_cancel(self._import_after)
+        super().destroy()
+
     def _on_select_change(self, event=None) -> None:
         sel = self.listbox.curselection()
         if sel:
@@ -153,16 +312,81 @@ class App(ttk.Frame):
         self.after(300, lambda: self.entry_input.config(foreground=orig))
 
 
+def benchmark_add(total: int = 50_000, block: int = 5_000) -> list[float]:
+    """
+    Agrega 'total' ítems por el mismo camino que el botón Agregar y muestra la
+    latencia media por ítem en cada bloque: debe mantenerse plana aunque crezca la lista.
+    """
+    root = tk.Tk()
+    root.withdraw()
+    app = App(root)
+    latencies = []
+    for start in range(0, total, block):
+        t0 = time.perf_counter()
+        for i in range(start, start + block):
+            app.input_var.set(f"Ítem {i}")
+            app._on_add()
+        root.update_idletasks()
+        micros = (time.perf_counter() - t0) * 1e6 / block
+        latencies.append(micros)
+        print(f"{start + block:>7} ítems: {micros:7.1f} µs/ítem")
+    # Un duplicado al final sigue siendo O(1)
+    t0 = time.perf_counter()
+    app.input_var.set("Ítem 0")
+    app._on_add()
+    print(f"Duplicado detectado en {(time.perf_counter() - t0) * 1e6:.1f} µs con {len(app.model)} ítems")
+    root.destroy()
+    return latencies
+
+
+def benchmark_import(total: int = 200_000, beat_ms: int = 5) -> tuple[float, float]:
+    """
+    Importa 'total' líneas (10% repetidas) y mide, con un latido de after(beat_ms),
+    el mayor tiempo que el bucle de eventos estuvo sin atender: la interfaz no debe congelarse.
+    """
+    root = tk.Tk()
+    root.withdraw()
+    app = App(root)
+    text = "\n".join(f"Línea {i % (total * 9 // 10)}" for i in range(total))
+    gaps: list[float] = []
+    last = [time.perf_counter()]
+
+    def beat() -> None:
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+        root.after(beat_ms, beat)
+
+    root.after(beat_ms, beat)
+    t0 = time.perf_counter()
+    app.start_import(text)
+    while app._import_queue is not None:
+        root.update()
+    elapsed = time.perf_counter() - t0
+    stall_ms = max(gaps, default=0.0) * 1000 - beat_ms
+    print(f"{total:,} líneas importadas en {elapsed:.2f} s -> {len(app.model):,} ítems; "
+          f"bloqueo máximo del bucle de eventos: {stall_ms:.1f} ms")
+    root.destroy()
+    return elapsed, stall_ms
+
+
 def main() -> None:
+    instalar_gancho()
     root = tk.Tk()
     # Estilo nativo con ttk
     try:
         ttk.Style().theme_use("clam")
     except tk.TclError:
         pass
-    App(root)
+    app = App(root)
+    app.iniciar_vigilancia()
     root.mainloop()
 
 
 if __name__ == "__main__":
-    main()
+    if "--bench" in sys.argv:
+        benchmark_add()
+    elif "--bench-import" in sys.argv:
+        benchmark_import()
+    else:
+        main()
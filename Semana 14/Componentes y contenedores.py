@@ -2,23 +2,514 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import datetime as dt
 import calendar
+import heapq
 import re
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+# Vigilante de bloqueos compartido
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+from vigilante_bucle import VigilanteBucleMixin, instalar_gancho  # noqa: E402
+
+
+ARCHIVO_EVENTOS = "agenda_eventos.jsonl"
+DURACION_EVENTO = 60  # minutos que ocupa cada evento al buscar solapes
+REPETICIONES = {"semanal": "cada semana", "mensual": "cada mes"}
+
+
+def a_minutos(hora: str) -> int:
+    horas, minutos = hora.split(":")
+    return int(horas) * 60 + int(minutos)
+
+
+def fechas_repetidas(inicio: dt.date, repetir: str, desde: dt.date, hasta: dt.date):
+    """
+    Genera perezosamente las fechas de una serie que caen en [desde, hasta).
+    'mensual' repite el mismo día de cada mes; si el mes es más corto, el último día.
+    """
+    if repetir == "semanal":
+        semanas = max(0, -(-(desde - inicio).days // 7))  # primera semana dentro del rango
+        fecha = inicio + dt.timedelta(weeks=semanas)
+        while fecha < hasta:
+            yield fecha
+            fecha += dt.timedelta(weeks=1)
+    elif repetir == "mensual":
+        desde = max(desde, inicio)
+        anio, mes = desde.year, desde.month
+        while True:
+            fecha = dt.date(anio, mes, min(inicio.day, calendar.monthrange(anio, mes)[1]))
+            if fecha >= hasta:
+                return
+            if fecha >= desde:
+                yield fecha
+            anio, mes = anio + mes // 12, mes % 12 + 1
+    else:
+        raise ValueError(f"Repetición desconocida: {repetir!r}")
+
+
+# -------------------------------
+#  Almacén de eventos ordenado
+# -------------------------------
+class Evento:
+    """
+    Evento de la agenda. El id es único y se usa también como iid del Treeview.
+    Con 'repetir' ("semanal" o "mensual") es una serie: se guarda una sola vez y
+    'fecha' es su primera ocurrencia.
+    """
+    __slots__ = ("id", "fecha", "hora", "descripcion", "repetir")
+
+    def __init__(self, id_evento: int, fecha: dt.date, hora: str, descripcion: str, repetir: str | None = None):
+        self.id = id_evento
+        self.fecha = fecha
+        self.hora = hora
+        self.descripcion = descripcion
+        self.repetir = repetir
+
+    @property
+    def clave(self):
+        """Clave de orden: (fecha, hora, id). 'HH:MM' con ceros ordena bien como texto."""
+        return (self.fecha, self.hora, self.id)
+
+    def __repr__(self):
+        return (f"Evento(id={self.id}, fecha={self.fecha}, hora='{self.hora}', "
+                f"descripcion='{self.descripcion}', repetir={self.repetir!r})")
+
+    def ocurrencias(self, desde: dt.date, hasta: dt.date):
+        """Ocurrencias de una serie en [desde, hasta), como Eventos con el id de la serie."""
+        for fecha in fechas_repetidas(self.fecha, self.repetir, desde, hasta):
+            yield Evento(self.id, fecha, self.hora, self.descripcion, self.repetir)
+
+
+class AlmacenEventos:
+    """
+    Eventos siempre ordenados por fecha y hora.
+    - Lista ORDENADA de claves (fecha, hora, id): inserción con bisect, sin reordenar todo.
+    - Diccionario {id: Evento}: eliminar/buscar por id sin recorrer la lista.
+    - Consultas por rango (día, semana, mes) con bisect: sólo se recorren los eventos del rango.
+    - Contador {fecha: nº de eventos}: saber qué días tienen eventos sin recorrerlos.
+    - Las series (eventos con repetición) se guardan una vez y sólo se expanden,
+      con generadores, dentro del rango consultado. Un índice por día de la semana
+      (semanales) y día del mes (mensuales) dice qué series caen en una fecha.
+    """
+
+    def __init__(self):
+        self._claves = []
+        self._por_id = {}
+        self._por_dia = {}
+        self._reglas = {}          # id -> serie
+        self._reglas_por_dia = {}  # ("semanal", weekday) / ("mensual", día) -> {ids}
+        self._siguiente_id = 1
+
+    def __len__(self):
+        return len(self._claves)
+
+    def __iter__(self):
+        """Recorre los eventos en orden cronológico."""
+        for clave in self._claves:
+            yield self._por_id[clave[2]]
+
+    def obtener(self, id_evento: int) -> Evento:
+        return self._por_id[id_evento]
+
+    def evento_en(self, posicion: int) -> Evento:
+        """Evento que ocupa esa posición en el orden cronológico (O(1))."""
+        return self._por_id[self._claves[posicion][2]]
+
+    def posicion(self, evento: Evento) -> int:
+        """Posición del evento en el orden cronológico."""
+        return bisect_left(self._claves, evento.clave)
+
+    def todos(self) -> list:
+        """Lista (sin orden garantizado) de todos los eventos; copia barata para otros hilos."""
+        return list(self._por_id.values())
+
+    def reservar_ids(self, siguiente_id: int):
+        """Evita que los eventos nuevos reutilicen ids ya guardados en disco."""
+        self._siguiente_id = max(self._siguiente_id, siguiente_id)
+
+    def agregar(self, fecha: dt.date, hora: str, descripcion: str, repetir: str | None = None,
+                id_evento: int | None = None) -> Evento:
+        if id_evento is None:
+            id_evento = self._siguiente_id
+        elif id_evento in self._por_id:
+            raise ValueError(f"Ya existe un evento con id {id_evento}.")
+        evento = Evento(id_evento, fecha, hora, descripcion, repetir)
+        self._siguiente_id = max(self._siguiente_id, id_evento + 1)
+        self._por_id[evento.id] = evento
+        self._alta(evento)
+        return evento
+
+    def eliminar(self, id_evento: int) -> Evento:
+        evento = self._por_id.pop(id_evento)
+        self._baja(evento)
+        return evento
+
+    def modificar(self, id_evento: int, fecha: dt.date, hora: str, descripcion: str,
+                  repetir: str | None = None) -> Evento:
+        """Cambia los datos de un evento y lo reubica en el orden."""
+        evento = self._por_id[id_evento]
+        self._baja(evento)
+        evento.fecha, evento.hora, evento.descripcion, evento.repetir = fecha, hora, descripcion, repetir
+        self._alta(evento)
+        return evento
+
+    # ---- Índices ----
+    def _alta(self, evento: Evento):
+        insort(self._claves, evento.clave)
+        if evento.repetir is None:
+            self._contar_dia(evento.fecha, 1)
+        else:
+            self._reglas[evento.id] = evento
+            self._reglas_por_dia.setdefault(self._clave_regla(evento), set()).add(evento.id)
+
+    def _baja(self, evento: Evento):
+        del self._claves[self.posicion(evento)]
+        if evento.repetir is None:
+            self._contar_dia(evento.fecha, -1)
+        else:
+            del self._reglas[evento.id]
+            clave = self._clave_regla(evento)
+            self._reglas_por_dia[clave].discard(evento.id)
+            if not self._reglas_por_dia[clave]:
+                del self._reglas_por_dia[clave]
+
+    def _contar_dia(self, fecha: dt.date, delta: int):
+        total = self._por_dia.get(fecha, 0) + delta
+        if total:
+            self._por_dia[fecha] = total
+        else:
+            del self._por_dia[fecha]
+
+    @staticmethod
+    def _clave_regla(serie: Evento):
+        if serie.repetir == "semanal":
+            return "semanal", serie.fecha.weekday()
+        return "mensual", serie.fecha.day
+
+    @staticmethod
+    def _claves_regla_en(fecha: dt.date) -> list:
+        """Claves del índice de series que pueden tener una ocurrencia en 'fecha'."""
+        claves = [("semanal", fecha.weekday()), ("mensual", fecha.day)]
+        if fecha.day == calendar.monthrange(fecha.year, fecha.month)[1]:
+            # Último día del mes: también caen aquí las series de los días 29-31 que no existen
+            claves += [("mensual", dia) for dia in range(fecha.day + 1, 32)]
+        return claves
+
+    def _reglas_en(self, fecha: dt.date):
+        """Series que tienen una ocurrencia en 'fecha' (sin recorrer todas las series)."""
+        for clave in self._claves_regla_en(fecha):
+            for id_serie in self._reglas_por_dia.get(clave, ()):
+                serie = self._reglas[id_serie]
+                if serie.fecha <= fecha:
+                    yield serie
+
+    def _reglas_entre(self, desde: dt.date, hasta: dt.date):
+        """
+        Series que pueden tener ocurrencias en [desde, hasta), sacadas del índice.
+        Bastan los primeros 31 días del rango: ya cubren todos los días de la semana y del mes.
+        """
+        claves = set()
+        fecha = desde
+        for _ in range(min((hasta - desde).days, 31)):
+            claves.update(self._claves_regla_en(fecha))
+            fecha += dt.timedelta(days=1)
+        for clave in claves:
+            for id_serie in self._reglas_por_dia.get(clave, ()):
+                serie = self._reglas[id_serie]
+                if serie.fecha < hasta:
+                    yield serie
+
+    def eventos_del_dia(self, fecha: dt.date) -> int:
+        """Número de eventos de ese día (O(1))."""
+        return self._por_dia.get(fecha, 0)
+
+    def dias_con_eventos(self, anio: int, mes: int) -> set:
+        """Días del mes (1..31) que tienen algún evento: 31 consultas al contador más las series que caen en el mes."""
+        por_dia = self._por_dia
+        ultimo = calendar.monthrange(anio, mes)[1]
+        dias = {dia for dia in range(1, ultimo + 1) if dt.date(anio, mes, dia) in por_dia}
+        primero, siguiente = dt.date(anio, mes, 1), dt.date(anio, mes, ultimo) + dt.timedelta(days=1)
+        for serie in self._reglas_entre(primero, siguiente):
+            dias.update(fecha.day for fecha in fechas_repetidas(serie.fecha, serie.repetir, primero, siguiente))
+        return dias
+
+    def conflictos(self, fecha: dt.date, hora: str, repetir: str | None = None, ignorar: int | None = None,
+                   horizonte_dias: int = 365, limite: int = 5) -> list:
+        """
+        Eventos (u ocurrencias de series) que se solapan con uno que empieza en fecha/hora
+        y dura DURACION_EVENTO minutos. Si el nuevo evento se repite, se revisan sus
+        ocurrencias del próximo 'horizonte_dias'. 'ignorar' es el id del propio evento.
+        """
+        minutos = a_minutos(hora)
+        # Empiezan a menos de DURACION_EVENTO minutos (antes o después) => se solapan
+        primero = max(0, minutos - DURACION_EVENTO + 1)
+        ultimo = min(24 * 60, minutos + DURACION_EVENTO)
+        desde_txt = f"{primero // 60:02d}:{primero % 60:02d}"
+        hasta_txt = f"{ultimo // 60:02d}:{ultimo % 60:02d}"  # "24:00" también ordena después de "23:59"
+
+        if repetir is None:
+            fechas = (fecha,)
+        else:
+            fechas = fechas_repetidas(fecha, repetir, fecha, fecha + dt.timedelta(days=horizonte_dias))
+        encontrados = []
+        for dia in fechas:
+            # Eventos sueltos: sólo el tramo de horas que puede solaparse, con bisect
+            inicio = bisect_left(self._claves, (dia, desde_txt))
+            fin = bisect_left(self._claves, (dia, hasta_txt))
+            for k in range(inicio, fin):
+                evento = self._por_id[self._claves[k][2]]
+                if evento.repetir is None and evento.id != ignorar:
+                    encontrados.append(evento)
+            # Series con ocurrencia ese día
+            for serie in self._reglas_en(dia):
+                if serie.id != ignorar and abs(a_minutos(serie.hora) - minutos) < DURACION_EVENTO:
+                    encontrados.append(Evento(serie.id, dia, serie.hora, serie.descripcion, serie.repetir))
+            if len(encontrados) >= limite:
+                break
+        return encontrados[:limite]
+
+    # ---- Consultas por rango (hasta es exclusivo) ----
+    def ocurrencias(self, desde: dt.date, hasta: dt.date):
+        """
+        Genera en orden cronológico los eventos de [desde, hasta). Las series se
+        expanden aquí, sólo para ese rango, y se intercalan con heapq.merge.
+        """
+        inicio = bisect_left(self._claves, (desde,))
+        fin = bisect_left(self._claves, (hasta,))
+        sueltos = (evento for evento in (self._por_id[self._claves[k][2]] for k in range(inicio, fin))
+                   if evento.repetir is None)
+        series = [serie.ocurrencias(desde, hasta) for serie in self._reglas_entre(desde, hasta)]
+        return heapq.merge(sueltos, *series, key=lambda evento: evento.clave)
+
+    def en_rango(self, desde: dt.date, hasta: dt.date) -> list:
+        return list(self.ocurrencias(desde, hasta))
+
+    def del_dia(self, fecha: dt.date) -> list:
+        return self.en_rango(fecha, fecha + dt.timedelta(days=1))
+
+    def de_la_semana(self, fecha: dt.date) -> list:
+        """Eventos de la semana (lunes a domingo) que contiene 'fecha'."""
+        lunes = fecha - dt.timedelta(days=fecha.weekday())
+        return self.en_rango(lunes, lunes + dt.timedelta(days=7))
+
+    def del_mes(self, anio: int, mes: int) -> list:
+        primero = dt.date(anio, mes, 1)
+        siguiente = dt.date(anio + mes // 12, mes % 12 + 1, 1)
+        return self.en_rango(primero, siguiente)
+
+
+# -------------------------------
+#  Persistencia de eventos
+# -------------------------------
+class ArchivoEventos:
+    """
+    Guarda la agenda en un diario de sólo-añadir, una lista JSON por línea:
+        ["A", id, fecha_ordinal, minutos, "descripción"]   alta
+        ["M", id, fecha_ordinal, minutos, "descripción"]   modificación
+        ["D", id]                                           baja
+    La fecha se guarda como date.toordinal() y la hora como minutos desde medianoche.
+    Las series añaden un sexto elemento con la repetición ("semanal" o "mensual").
+
+    - La carga se hace en un hilo y los eventos se entregan por lotes con after(),
+      así la ventana aparece enseguida aunque el archivo sea grande.
+    - Cuando hay muchos registros obsoletos, se compacta en un hilo: se escribe un
+      archivo nuevo sólo con las altas vigentes y se reemplaza el anterior. Lo
+      anotado mientras tanto se añade también al archivo nuevo.
+    """
+    UMBRAL_COMPACTACION = 1000  # registros mínimos antes de plantearse compactar
+    TAMANO_LOTE = 2000          # eventos entregados a la interfaz por cada after()
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._candado = threading.Lock()
+        self._archivo = None
+        self._registros = 0
+        self._cargado = False
+        self.error_carga = None     # excepción si no se pudo leer el archivo
+        self._compactando = False
+        self._durante_compactacion = []
+        self._hilo_compactacion = None
+
+    # ---- Codificación ----
+    @staticmethod
+    def codificar(tipo: str, evento: Evento) -> str:
+        registro = [tipo, evento.id, evento.fecha.toordinal(), a_minutos(evento.hora), evento.descripcion]
+        if evento.repetir is not None:
+            registro.append(evento.repetir)
+        return json.dumps(registro, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def decodificar(ordinal: int, minutos: int):
+        return dt.date.fromordinal(ordinal), f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+    # ---- Lectura ----
+    def leer(self):
+        """Reproduce el diario; devuelve ({id: (ordinal, minutos, descripción[, repetir])}, nº de registros)."""
+        vivos = {}
+        registros = 0
+        try:
+            # En binario: cada línea se decodifica por separado, así una cortada a mitad
+            # de un carácter (p. ej. "Cumpleaños") no impide leer las demás
+            with open(self.ruta, "rb") as f:
+                for linea in f:
+                    try:
+                        tipo, id_evento, *datos = json.loads(linea.decode("utf-8"))
+                        if not isinstance(id_evento, int):
+                            continue
+                        if tipo == "D" and not datos:
+                            vivos.pop(id_evento, None)
+                        elif tipo in ("A", "M") and len(datos) in (3, 4) and isinstance(datos[2], str):
+                            self.decodificar(datos[0], datos[1])  # fecha y hora utilizables
+                            vivos[id_evento] = tuple(datos)
+                        else:
+                            continue
+                    except (ValueError, TypeError, OverflowError):
+                        continue  # línea cortada por un cierre inesperado o registro con otra forma
+                    registros += 1
+        except FileNotFoundError:
+            pass
+        return vivos, registros
+
+    def cargar_en_segundo_plano(self, widget, al_iniciar, al_recibir_lote, al_terminar):
+        """
+        Lee el archivo en un hilo. En el hilo principal (vía widget.after) se llama a:
+        al_iniciar(siguiente_id), luego al_recibir_lote([(id, fecha, hora, desc, repetir), ...])
+        por cada lote en orden cronológico y al final al_terminar(total).
+        Si la lectura falla, se llama igualmente a al_iniciar y al_terminar, y el error
+        queda en error_carga (sin compactar: el archivo no se llegó a leer entero).
+        """
+        cola = queue.Queue()
+
+        def trabajar():
+            iniciado = False
+            total = 0
+            try:
+                vivos, registros = self.leer()
+                with self._candado:
+                    self._registros += registros
+                cola.put(("inicio", max(vivos, default=0) + 1))
+                iniciado = True
+                ordenados = sorted(vivos.items(), key=lambda par: (par[1][0], par[1][1], par[0]))
+                for i in range(0, len(ordenados), self.TAMANO_LOTE):
+                    lote = [(id_evento, *self.decodificar(ordinal, minutos), desc, resto[0] if resto else None)
+                            for id_evento, (ordinal, minutos, desc, *resto) in ordenados[i:i + self.TAMANO_LOTE]]
+                    cola.put(("lote", lote))
+                    total += len(lote)
+            except Exception as error:  # la ventana no debe quedarse "cargando" para siempre
+                self.error_carga = error
+            finally:
+                if not iniciado:
+                    cola.put(("inicio", 1))
+                cola.put(("fin", total))
+
+        def sondear():
+            # Un mensaje por vuelta del bucle de eventos: la interfaz sigue respondiendo
+            try:
+                tipo, dato = cola.get_nowait()
+            except queue.Empty:
+                widget.after(20, sondear)
+                return
+            if tipo == "inicio":
+                al_iniciar(dato)
+            elif tipo == "lote":
+                al_recibir_lote(dato)
+            else:
+                self._cargado = self.error_carga is None
+                al_terminar(dato)
+                return
+            widget.after(1, sondear)
+
+        threading.Thread(target=trabajar, daemon=True).start()
+        widget.after(20, sondear)
+
+    # ---- Escritura ----
+    def anotar(self, tipo: str, evento: Evento, almacen: AlmacenEventos):
+        """Añade un registro al final del archivo y compacta en segundo plano si conviene."""
+        if tipo == "D":
+            linea = json.dumps(["D", evento.id]) + "\n"
+        else:
+            linea = self.codificar(tipo, evento)
+        with self._candado:
+            if self._archivo is None:
+                self._archivo = open(self.ruta, "a", encoding="utf-8")
+            self._archivo.write(linea)
+            self._archivo.flush()
+            self._registros += 1
+            if self._compactando:
+                self._durante_compactacion.append(linea)
+            compactar = (self._cargado and not self._compactando
+                         and self._registros > max(self.UMBRAL_COMPACTACION, 2 * len(almacen)))
+            if compactar:
+                self._compactando = True
+        if compactar:
+            eventos = almacen.todos()
+            self._hilo_compactacion = threading.Thread(target=self._compactar, args=(eventos,), daemon=True)
+            self._hilo_compactacion.start()
+
+    def _compactar(self, eventos):
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            for evento in eventos:
+                f.write(self.codificar("A", evento))
+            with self._candado:
+                # Lo anotado mientras se escribía el archivo nuevo se repite al final
+                f.writelines(self._durante_compactacion)
+                f.flush()
+                if self._archivo is not None:
+                    self._archivo.close()
+                    self._archivo = None
+                os.replace(temporal, self.ruta)
+                self._registros = len(eventos) + len(self._durante_compactacion)
+                self._durante_compactacion = []
+                self._compactando = False
+
+    def cerrar(self):
+        """Espera a una compactación en curso y cierra el archivo."""
+        if self._hilo_compactacion is not None:
+            self._hilo_compactacion.join()
+        with self._candado:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
 
 
 # -------------------------------
 #  DatePicker simple (sin extras)
 # -------------------------------
+_CALENDARIO = calendar.Calendar(firstweekday=calendar.MONDAY)
+
+
+@lru_cache(maxsize=120)
+def semanas_del_mes(anio: int, mes: int) -> tuple:
+    """Semanas del mes de lunes a domingo (0 = día de otro mes). Se calcula una vez por mes."""
+    return tuple(tuple(semana) for semana in _CALENDARIO.monthdayscalendar(anio, mes))
+
+
 class DatePicker(tk.Toplevel):
     """
     Selector de fecha básico hecho con Tkinter puro.
     - Permite navegar entre meses y escoger un día.
     - Devuelve la fecha seleccionada en formato dt.date.
+    - La cuadrícula de 6x7 botones se crea una sola vez; al cambiar de mes sólo
+      se reconfiguran los botones cuyo día o estilo cambia.
+    - dias_con_eventos(anio, mes) -> conjunto de días (opcional): esos días se
+      resaltan en negrita.
     Uso:
         picker = DatePicker(parent, initial_date=dt.date.today())
         parent.wait_window(picker)              # bloquea hasta cerrar
         fecha = picker.selected_date            # dt.date o None
     """
-    def __init__(self, master, initial_date=None):
+    DIAS_SEMANA = ("L", "M", "X", "J", "V", "S", "D")
+    FILAS = 6  # un mes ocupa como mucho 6 semanas
+
+    def __init__(self, master, initial_date=None, dias_con_eventos=None):
         super().__init__(master)
         self.title("Seleccionar fecha")
         self.resizable(False, False)
@@ -31,9 +522,11 @@ class DatePicker(tk.Toplevel):
         self.year = initial.year
         self.month = initial.month
         self.selected_date = None
+        self.dias_con_eventos = dias_con_eventos
 
         # Estilos
         self.configure(padx=8, pady=8)
+        ttk.Style(self).configure("ConEventos.TButton", font=("", 9, "bold"), foreground="#1a5fb4")
 
         # Encabezado (mes/año + navegación)
         header = ttk.Frame(self)
@@ -52,6 +545,17 @@ class DatePicker(tk.Toplevel):
         # Días de la semana
         self.grid_days = ttk.Frame(self)
         self.grid_days.grid(row=1, column=0)
+        for col, name in enumerate(self.DIAS_SEMANA):
+            ttk.Label(self.grid_days, text=name, anchor="center").grid(row=0, column=col, padx=4, pady=2)
+
+        # Cuadrícula fija de días; (día, estilo) que muestra cada celda (-1 = aún sin configurar)
+        self._celdas = []
+        self._estado_celdas = []
+        for k in range(self.FILAS * 7):
+            btn = ttk.Button(self.grid_days, width=3, command=lambda k=k: self.choose_day(self._estado_celdas[k][0]))
+            btn.grid(row=k // 7 + 1, column=k % 7, padx=2, pady=2)
+            self._celdas.append(btn)
+            self._estado_celdas.append((-1, None))
 
         # Botones inferiores
         footer = ttk.Frame(self)
@@ -108,49 +612,56 @@ class DatePicker(tk.Toplevel):
         self.destroy()
 
     def draw_calendar(self):
-        """Dibuja el calendario del mes actual."""
-        # Limpiar contenido de la grilla de días
-        for child in self.grid_days.winfo_children():
-            child.destroy()
-
+        """Muestra el mes actual reutilizando los botones de la cuadrícula."""
         # Título Mes/Año
         month_name = calendar.month_name[self.month].capitalize()
         self.lbl_title.config(text=f"{month_name} {self.year}")
 
-        # Encabezado de días (L a D)
-        days_header = ["L", "M", "X", "J", "V", "S", "D"]
-        for col, name in enumerate(days_header):
-            ttk.Label(self.grid_days, text=name, anchor="center").grid(row=0, column=col, padx=4, pady=2)
-
-        # Matriz del calendario: semanas x días
-        cal = calendar.Calendar(firstweekday=0)  # 0 = lunes
-        # Ajuste para mostrar L-D (si tu región considera lunes=0; si no, adapta)
-        # NOTE: Python usa 0=lunes por calendar.setfirstweekday(0) en algunas versiones
-        # Para forzar:
-        calendar.setfirstweekday(calendar.MONDAY)
-        weeks = calendar.monthcalendar(self.year, self.month)
-
-        # Crear botones de días
-        for r, week in enumerate(weeks, start=1):
-            for c, day in enumerate(week):
-                if day == 0:
-                    # Día vacío (relleno de la cuadricula)
-                    ttk.Label(self.grid_days, text=" ").grid(row=r, column=c, padx=2, pady=2)
-                else:
-                    btn = ttk.Button(self.grid_days, text=str(day), width=3,
-                                     command=lambda d=day: self.choose_day(d))
-                    btn.grid(row=r, column=c, padx=2, pady=2)
+        weeks = semanas_del_mes(self.year, self.month)
+        con_eventos = self.dias_con_eventos(self.year, self.month) if self.dias_con_eventos else ()
+
+        for k, btn in enumerate(self._celdas):
+            fila = k // 7
+            day = weeks[fila][k % 7] if fila < len(weeks) else 0
+            estado = (day, "ConEventos.TButton" if day in con_eventos else "TButton")
+            anterior = self._estado_celdas[k]
+            if estado == anterior:
+                continue
+            self._estado_celdas[k] = estado
+            if day == 0:
+                # Día vacío (relleno de la cuadrícula): se oculta sin destruirlo
+                btn.grid_remove()
+                continue
+            btn.configure(text=str(day), style=estado[1])
+            if anterior[0] == 0:
+                btn.grid()
 
 
 # -------------------------------
 #   Aplicación principal
 # -------------------------------
-class AgendaApp(tk.Tk):
-    """Aplicación de Agenda Personal con Tkinter + ttk."""
+class AgendaApp(VigilanteBucleMixin, tk.Tk):
+    """
+    Aplicación de Agenda Personal con Tkinter + ttk.
+
+    Con modo_virtual=True el Treeview sólo contiene las filas visibles: al
+    desplazarse se reutilizan esas mismas filas con los eventos que tocan
+    (leídos por posición del almacén), así la memoria y el arranque no dependen
+    del número de eventos.
+
+    Con 'archivo' los eventos se guardan en disco (ArchivoEventos) y se cargan en
+    segundo plano al arrancar.
+    """
     TIME_REGEX = re.compile(r"^(?:[01]\d|2[0-3]):[0-5]\d$")  # HH:MM formato 24h
+    FILAS_POR_RUEDA = 3  # filas desplazadas por cada paso de la rueda del ratón
+    SIN_REPETIR = "no se repite"
 
-    def __init__(self):
+    def __init__(self, modo_virtual=False, archivo=None):
         super().__init__()
+        self.modo_virtual = modo_virtual
+        self._primera_fila = 0        # (modo virtual) posición del primer evento mostrado
+        self._filas_visibles = 10     # (modo virtual) filas que caben en el Treeview
+        self._id_seleccionado = None  # evento seleccionado (en modo virtual, aunque no esté a la vista)
         self.title("Agenda Personal - Tkinter")
         self.geometry("760x480")
         self.minsize(720, 420)
@@ -183,16 +694,32 @@ class AgendaApp(tk.Tk):
         self.tree.column("hora", width=120, anchor="center")
         self.tree.column("descripcion", width=420, anchor="w")
 
-        scroll_y = ttk.Scrollbar(self.frame_lista, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scroll_y.set)
+        self.scroll_y = ttk.Scrollbar(self.frame_lista, orient="vertical")
+        if self.modo_virtual:
+            # La barra no desplaza el Treeview: indica qué ventana del almacén se muestra
+            self.scroll_y.configure(command=self.desplazar_virtual)
+            self.tree.bind("<Configure>", self._ajustar_filas_visibles)
+            self.tree.bind("<MouseWheel>", self._rueda_virtual)
+            self.tree.bind("<Button-4>", lambda e: self.desplazar_virtual("scroll", -1, "units"))
+            self.tree.bind("<Button-5>", lambda e: self.desplazar_virtual("scroll", 1, "units"))
+            # Las flechas recorren el almacén, no sólo las filas que hay en el Treeview
+            self.tree.bind("<Up>", lambda e: self.mover_seleccion_virtual(-1))
+            self.tree.bind("<Down>", lambda e: self.mover_seleccion_virtual(1))
+            self.tree.bind("<Prior>", lambda e: self.mover_seleccion_virtual(-self._filas_visibles))
+            self.tree.bind("<Next>", lambda e: self.mover_seleccion_virtual(self._filas_visibles))
+        else:
+            self.scroll_y.configure(command=self.tree.yview)
+            self.tree.configure(yscrollcommand=self.scroll_y.set)
 
         self.tree.pack(side="left", fill="both", expand=True)
-        scroll_y.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewSelect>>", self.cargar_seleccion)
+        self.scroll_y.pack(side="right", fill="y")
 
         # ------------------ Formulario ------------------
         # Etiquetas
         ttk.Label(self.frame_form, text="Fecha:").grid(row=0, column=0, sticky="w", padx=(8, 6), pady=8)
         ttk.Label(self.frame_form, text="Hora (24h):").grid(row=0, column=2, sticky="w", padx=(8, 6), pady=8)
+        ttk.Label(self.frame_form, text="Repetir:").grid(row=0, column=4, sticky="w", padx=(8, 6), pady=8)
         ttk.Label(self.frame_form, text="Descripción:").grid(row=1, column=0, sticky="w", padx=(8, 6), pady=(0, 10))
 
         # Fecha: Entry + botón DatePicker
@@ -209,10 +736,16 @@ class AgendaApp(tk.Tk):
         self.entry_hora.grid(row=0, column=3, sticky="w", padx=(0, 6), pady=8)
         self.entry_hora.insert(0, "08:00")  # valor por defecto
 
+        # Repetición: un evento suelto o una serie semanal/mensual
+        self.var_repetir = tk.StringVar(value=self.SIN_REPETIR)
+        self.combo_repetir = ttk.Combobox(self.frame_form, textvariable=self.var_repetir, width=12, state="readonly",
+                                          values=(self.SIN_REPETIR, *REPETICIONES.values()))
+        self.combo_repetir.grid(row=0, column=5, sticky="w", padx=(0, 8), pady=8)
+
         # Descripción: Entry ancho
         self.var_desc = tk.StringVar()
         self.entry_desc = ttk.Entry(self.frame_form, textvariable=self.var_desc, width=70)
-        self.entry_desc.grid(row=1, column=1, columnspan=3, sticky="ew", padx=(0, 8), pady=(0, 10))
+        self.entry_desc.grid(row=1, column=1, columnspan=5, sticky="ew", padx=(0, 8), pady=(0, 10))
 
         # Ajuste de columnas del frame_form
         self.frame_form.columnconfigure(1, weight=1)
@@ -220,16 +753,26 @@ class AgendaApp(tk.Tk):
 
         # ------------------ Botones de acción ------------------
         self.btn_agregar = ttk.Button(self.frame_acciones, text="Agregar evento", command=self.agregar_evento)
+        self.btn_modificar = ttk.Button(self.frame_acciones, text="Modificar seleccionado", command=self.modificar_seleccion)
         self.btn_eliminar = ttk.Button(self.frame_acciones, text="Eliminar seleccionado", command=self.eliminar_seleccion)
         self.btn_salir = ttk.Button(self.frame_acciones, text="Salir", command=self.destroy)
 
         self.btn_agregar.pack(side="left", padx=5)
+        self.btn_modificar.pack(side="left", padx=5)
         self.btn_eliminar.pack(side="left", padx=5)
         self.btn_salir.pack(side="right", padx=5)
 
-        # Lista interna de eventos (para ordenar/validar si lo necesitas)
-        # Estructura: [(date_obj, "HH:MM", "Descripción"), ...]
-        self.eventos = []
+        # Almacén interno de eventos, siempre ordenado por fecha y hora
+        self.eventos = AlmacenEventos()
+
+        # Persistencia: la carga corre en un hilo; hasta conocer los ids guardados no se puede agregar
+        self.archivo_eventos = ArchivoEventos(archivo) if archivo else None
+        if self.archivo_eventos is not None:
+            self._titulo = self.title()
+            self.title(f"{self._titulo} (cargando…)")
+            self.btn_agregar.state(["disabled"])
+            self.archivo_eventos.cargar_en_segundo_plano(
+                self, self._carga_iniciada, self._lote_cargado, self._carga_terminada)
 
         # Fecha por defecto: hoy
         self.set_fecha(dt.date.today())
@@ -245,7 +788,7 @@ class AgendaApp(tk.Tk):
             except ValueError:
                 initial = None
 
-        picker = DatePicker(self, initial_date=initial)
+        picker = DatePicker(self, initial_date=initial, dias_con_eventos=self.eventos.dias_con_eventos)
         self.wait_window(picker)
         if picker.selected_date:
             self.set_fecha(picker.selected_date)
@@ -266,9 +809,8 @@ class AgendaApp(tk.Tk):
         """Valida formato 24h HH:MM."""
         return bool(self.TIME_REGEX.match(texto_hora.strip()))
 
-    # ------------------ Operaciones ------------------
-    def agregar_evento(self):
-        """Lee los campos, valida y agrega a la tabla (Treeview)."""
+    def leer_formulario(self):
+        """Valida los campos del formulario; devuelve (fecha, hora, descripción, repetir) o None si hay errores."""
         fecha_txt = self.var_fecha.get().strip()
         hora_txt = self.var_hora.get().strip()
         desc_txt = self.var_desc.get().strip()
@@ -276,72 +818,349 @@ class AgendaApp(tk.Tk):
         # Validar campos obligatorios
         if not fecha_txt or not hora_txt or not desc_txt:
             messagebox.showwarning("Campos incompletos", "Por favor, completa fecha, hora y descripción.")
-            return
+            return None
 
         # Validar fecha y hora
         fecha_obj = self.validar_fecha(fecha_txt)
         if not fecha_obj:
             messagebox.showerror("Fecha inválida", "La fecha debe tener el formato dd/mm/aaaa.")
-            return
+            return None
 
         if not self.validar_hora(hora_txt):
             messagebox.showerror("Hora inválida", "La hora debe tener el formato 24h HH:MM (ej. 08:30, 14:05).")
-            return
+            return None
+
+        repetir = next((clave for clave, texto in REPETICIONES.items() if texto == self.var_repetir.get()), None)
+        return fecha_obj, hora_txt, desc_txt, repetir
 
-        # Agregar a la lista interna
-        self.eventos.append((fecha_obj, hora_txt, desc_txt))
-        # Ordenar por fecha y hora para que la vista quede organizada
-        self.eventos.sort(key=lambda e: (e[0], e[1]))
+    def confirmar_conflictos(self, datos, ignorar=None) -> bool:
+        """Avisa si el evento se solapa con otros ese mismo día; devuelve True si se puede guardar."""
+        fecha, hora, _, repetir = datos
+        choques = self.eventos.conflictos(fecha, hora, repetir, ignorar=ignorar)
+        if not choques:
+            return True
+        lineas = "\n".join(f"{ev.fecha.strftime('%d/%m/%Y')} {ev.hora}  {ev.descripcion}" for ev in choques)
+        return messagebox.askyesno("Conflicto de horario",
+                                   f"El evento se solapa con:\n{lineas}\n\n¿Guardarlo de todos modos?")
 
-        # Repintar Treeview (simple y claro para esta escala)
-        self.refrescar_tree()
+    # ------------------ Operaciones ------------------
+    def agregar_evento(self):
+        """Lee los campos, valida y agrega a la tabla (Treeview)."""
+        datos = self.leer_formulario()
+        if datos is None or not self.confirmar_conflictos(datos):
+            return
+
+        # Agregar al almacén y sólo esa fila al Treeview, en su posición ordenada
+        evento = self.eventos.agregar(*datos)
+        self.insertar_fila(evento)
+        self.guardar("A", evento)
 
         # Limpiar únicamente la descripción para acelerar el ingreso de varios eventos
         self.var_desc.set("")
         self.entry_desc.focus()
 
-    def eliminar_seleccion(self):
-        """Elimina el evento seleccionado en el Treeview (con confirmación)."""
+    def modificar_seleccion(self):
+        """Aplica los datos del formulario al evento seleccionado y mueve su fila si cambia de posición."""
+        id_evento = self._id_seleccionado
+        if id_evento is None:
+            messagebox.showinfo("Sin selección", "Selecciona un evento en la lista para modificar.")
+            return
+
+        datos = self.leer_formulario()
+        if datos is None or not self.confirmar_conflictos(datos, ignorar=id_evento):
+            return
+
+        evento = self.eventos.modificar(id_evento, *datos)
+        self.actualizar_fila(evento)
+        self.guardar("M", evento)
+
+    def cargar_seleccion(self, event=None):
+        """Recuerda el evento seleccionado y lo copia al formulario para poder modificarlo."""
         selected = self.tree.selection()
         if not selected:
+            # En modo virtual la fila se vacía también cuando el evento sale de la vista:
+            # sólo se olvida si sigue a la vista (el usuario quitó la selección)
+            if not self.modo_virtual or self._seleccion_a_la_vista():
+                self._id_seleccionado = None
+            return
+        id_evento = self.id_evento(selected[0])
+        if id_evento == self._id_seleccionado:
+            return  # la misma selección repuesta tras desplazar: no pisar el formulario
+        self._id_seleccionado = id_evento
+        self.cargar_formulario(self.eventos.obtener(id_evento))
+
+    def cargar_formulario(self, evento: Evento):
+        self.set_fecha(evento.fecha)
+        self.var_hora.set(evento.hora)
+        self.var_desc.set(evento.descripcion)
+        self.var_repetir.set(REPETICIONES.get(evento.repetir, self.SIN_REPETIR))
+
+    def eliminar_seleccion(self):
+        """Elimina el evento seleccionado (con confirmación), aunque en modo virtual no esté a la vista."""
+        id_evento = self._id_seleccionado
+        if id_evento is None:
             messagebox.showinfo("Sin selección", "Selecciona un evento en la lista para eliminar.")
             return
 
         if not messagebox.askyesno("Confirmar eliminación", "¿Deseas eliminar el evento seleccionado?"):
             return
 
-        # Recuperar valores del Treeview
-        item_id = selected[0]
-        valores = self.tree.item(item_id, "values")  # (fecha_txt, hora_txt, desc)
-        fecha_txt, hora_txt, desc_txt = valores
-
-        # Convertir fecha de texto a date para comparar con la lista interna
-        try:
-            fecha_obj = dt.datetime.strptime(fecha_txt, "%d/%m/%Y").date()
-        except ValueError:
-            fecha_obj = None
-
-        # Quitar de la lista interna (primer match)
-        for i, (f, h, d) in enumerate(self.eventos):
-            if f == fecha_obj and h == hora_txt and d == desc_txt:
-                del self.eventos[i]
-                break
+        evento = self.eventos.eliminar(id_evento)
+        self.guardar("D", evento)
+        self._id_seleccionado = None
 
-        # Quitar del Treeview
-        self.tree.delete(item_id)
+        # Quitar del Treeview (fuera del modo virtual el iid de cada fila es el id del evento)
+        if self.modo_virtual:
+            self.repintar_ventana()
+        else:
+            self.tree.delete(str(id_evento))
+
+    # ------------------ Vista (actualizaciones incrementales) ------------------
+    @staticmethod
+    def valores_fila(evento: Evento):
+        descripcion = evento.descripcion
+        if evento.repetir is not None:
+            descripcion += f"  (↻ {REPETICIONES[evento.repetir]}, desde esta fecha)"
+        return evento.fecha.strftime("%d/%m/%Y"), evento.hora, descripcion
+
+    def id_evento(self, iid: str) -> int:
+        """Id del evento mostrado en una fila del Treeview."""
+        if self.modo_virtual:
+            # Filas reutilizables "v0", "v1", ...: la k-ésima muestra el evento primera_fila + k
+            return self.eventos.evento_en(self._primera_fila + int(iid[1:])).id
+        return int(iid)
+
+    def insertar_fila(self, evento: Evento):
+        """Inserta una sola fila en la posición que le corresponde según el almacén."""
+        posicion = self.eventos.posicion(evento)
+        if self.modo_virtual:
+            self.mostrar_posicion(posicion)
+            return
+        # Al final se usa "end": evita que Tk recorra las filas buscando el índice
+        indice = "end" if posicion == len(self.eventos) - 1 else posicion
+        self.tree.insert("", indice, iid=str(evento.id), values=self.valores_fila(evento))
+
+    def actualizar_fila(self, evento: Evento):
+        """Actualiza los valores de una fila y la mueve a su nueva posición."""
+        if self.modo_virtual:
+            self.mostrar_posicion(self.eventos.posicion(evento))
+            return
+        iid = str(evento.id)
+        self.tree.item(iid, values=self.valores_fila(evento))
+        # Se desengancha primero: así el índice de move() no cuenta la propia fila
+        self.tree.detach(iid)
+        self.tree.move(iid, "", self.eventos.posicion(evento))
+        self.tree.see(iid)
 
     def refrescar_tree(self):
-        """Limpia y vuelve a cargar los datos del Treeview en el orden actual."""
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        """Limpia y vuelve a cargar los datos del Treeview en el orden actual (para cargas completas)."""
+        if self.modo_virtual:
+            self.repintar_ventana()
+            return
+        self.tree.delete(*self.tree.get_children())
+
+        for ev in self.eventos:
+            self.tree.insert("", "end", iid=str(ev.id), values=self.valores_fila(ev))
+
+    # ------------------ Persistencia ------------------
+    def guardar(self, tipo: str, evento: Evento):
+        if self.archivo_eventos is not None:
+            self.archivo_eventos.anotar(tipo, evento, self.eventos)
+
+    def _carga_iniciada(self, siguiente_id: int):
+        self.eventos.reservar_ids(siguiente_id)
+        self.btn_agregar.state(["!disabled"])
+
+    def _lote_cargado(self, lote):
+        for id_evento, fecha, hora, desc, repetir in lote:
+            evento = self.eventos.agregar(fecha, hora, desc, repetir, id_evento=id_evento)
+            if not self.modo_virtual:
+                self.insertar_fila(evento)
+        if self.modo_virtual:
+            self.repintar_ventana()
+
+    def _carga_terminada(self, total: int):
+        error = self.archivo_eventos.error_carga
+        if error is None:
+            self.title(self._titulo)
+        else:
+            # Sin conocer los ids guardados, uno nuevo podría pisar a uno del archivo
+            self.btn_agregar.state(["disabled"])
+            self.title(f"{self._titulo} (archivo sin leer)")
+            messagebox.showerror("No se pudo leer la agenda", f"{self.archivo_eventos.ruta}: {error}")
+
+    def destroy(self):
+        if getattr(self, "archivo_eventos", None) is not None:
+            self.archivo_eventos.cerrar()
+        super().destroy()
+
+    # ------------------ Lista virtual ------------------
+    def repintar_ventana(self):
+        """Rellena las filas visibles con los eventos de la ventana actual (coste O(filas visibles))."""
+        total = len(self.eventos)
+        self._primera_fila = max(0, min(self._primera_fila, total - self._filas_visibles))
+        cantidad = min(self._filas_visibles, total - self._primera_fila)
+
+        hijos = self.tree.get_children()
+        for k in range(len(hijos), cantidad):
+            self.tree.insert("", "end", iid=f"v{k}")
+        if len(hijos) > cantidad:
+            self.tree.delete(*hijos[cantidad:])
+
+        seleccion = ()
+        for k in range(cantidad):
+            evento = self.eventos.evento_en(self._primera_fila + k)
+            self.tree.item(f"v{k}", values=self.valores_fila(evento))
+            if evento.id == self._id_seleccionado:
+                seleccion = (f"v{k}",)
+        # La selección sigue al evento, no a la fila reutilizada
+        if tuple(self.tree.selection()) != seleccion:
+            self.tree.selection_set(seleccion)
+
+        if total:
+            self.scroll_y.set(self._primera_fila / total, (self._primera_fila + cantidad) / total)
+        else:
+            self.scroll_y.set(0.0, 1.0)
+
+    def _seleccion_a_la_vista(self) -> bool:
+        if self._id_seleccionado is None:
+            return False
+        posicion = self.eventos.posicion(self.eventos.obtener(self._id_seleccionado))
+        return self._primera_fila <= posicion < self._primera_fila + self._filas_visibles
+
+    def mover_seleccion_virtual(self, paso: int):
+        """Flechas / RePág / AvPág: mueve la selección por el almacén y desplaza lo justo para verla."""
+        total = len(self.eventos)
+        if not total:
+            return "break"
+        if self._id_seleccionado is None:
+            posicion = self._primera_fila
+        else:
+            posicion = self.eventos.posicion(self.eventos.obtener(self._id_seleccionado)) + paso
+        posicion = max(0, min(posicion, total - 1))
+        evento = self.eventos.evento_en(posicion)
+        self._id_seleccionado = evento.id
+        self.cargar_formulario(evento)
+        if posicion < self._primera_fila:
+            self._primera_fila = posicion
+        elif posicion >= self._primera_fila + self._filas_visibles:
+            self._primera_fila = posicion - self._filas_visibles + 1
+        self.repintar_ventana()
+        return "break"  # evita que el Treeview mueva el foco entre sus propias filas
+
+    def mostrar_posicion(self, posicion: int):
+        """Desplaza la ventana para que el evento en 'posicion' quede a la vista."""
+        if not self._primera_fila <= posicion < self._primera_fila + self._filas_visibles:
+            self._primera_fila = posicion - self._filas_visibles // 2
+        self.repintar_ventana()
+
+    def desplazar_virtual(self, accion, cantidad, unidad=None):
+        """Comando de la barra de desplazamiento: ('moveto', fracción) o ('scroll', n, 'units'|'pages')."""
+        if accion == "moveto":
+            self._primera_fila = int(float(cantidad) * len(self.eventos))
+        elif accion == "scroll":
+            paso = self._filas_visibles if unidad == "pages" else 1
+            self._primera_fila += int(cantidad) * paso
+        self.repintar_ventana()
+
+    def _rueda_virtual(self, event):
+        pasos = -1 if event.delta > 0 else 1
+        self.desplazar_virtual("scroll", pasos * self.FILAS_POR_RUEDA, "units")
+        return "break"
+
+    def _ajustar_filas_visibles(self, event):
+        """Recalcula cuántas filas caben cuando cambia el tamaño del Treeview."""
+        alto_fila = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        filas = max(1, (event.height - alto_fila) // alto_fila)  # se descuenta el encabezado
+        if filas != self._filas_visibles:
+            self._filas_visibles = filas
+            self.repintar_ventana()
+
 
-        for f, h, d in self.eventos:
-            self.tree.insert("", "end", values=(f.strftime("%d/%m/%Y"), h, d))
+# -------------------------------
+#  Benchmark (ejecutar con --bench)
+# -------------------------------
+def benchmark_agregar(tamanos=(100, 10_000, 100_000), muestras=100, modo_virtual=False):
+    """
+    Mide la latencia media de agregar_evento (inserción incremental) con la agenda ya
+    cargada con N eventos, frente a un repintado completo con refrescar_tree.
+    También informa del tiempo de carga inicial (almacén + Treeview).
+    """
+    rnd = random.Random(1)
+    inicio_anio = dt.date(2024, 1, 1)
+
+    def fecha_al_azar():
+        return inicio_anio + dt.timedelta(days=rnd.randrange(3 * 365))
+
+    def comprobar_conflictos(app, consultas):
+        """Compara cada resultado de conflictos() con un recorrido completo de los eventos anteriores."""
+        por_dia = {}
+        for evento in app.eventos:
+            por_dia.setdefault(evento.fecha, []).append(evento)
+        con_solape = 0
+        for fecha, hora, hallados, siguiente_id in consultas:
+            esperados = {evento.id for evento in por_dia.get(fecha, ())
+                         if evento.id < siguiente_id
+                         and abs(a_minutos(evento.hora) - a_minutos(hora)) < DURACION_EVENTO}
+            assert set(hallados) <= esperados and len(hallados) == min(len(esperados), 5), \
+                f"conflictos({fecha}, {hora}) = {hallados}, se esperaban {sorted(esperados)}"
+            con_solape += bool(hallados)
+        return con_solape
+
+    resultados = {}
+    for n in tamanos:
+        app = AgendaApp(modo_virtual=modo_virtual)
+        app.withdraw()
+        # Sin diálogos: se mide la búsqueda de solapes, se anota el resultado y siempre se acepta guardar
+        consultas = []
+
+        def confirmar_sin_dialogo(datos, ignorar=None, app=app, consultas=consultas):
+            hallados = app.eventos.conflictos(*datos[:2], ignorar=ignorar)
+            consultas.append((datos[0], datos[1], [evento.id for evento in hallados], app.eventos._siguiente_id))
+            return True
+
+        app.confirmar_conflictos = confirmar_sin_dialogo
+        inicio = time.perf_counter()
+        for _ in range(n):
+            app.eventos.agregar(fecha_al_azar(), f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}", "Evento")
+        app.refrescar_tree()
+        app.update()
+        carga_ms = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        for _ in range(muestras):
+            app.set_fecha(fecha_al_azar())
+            app.var_hora.set("10:30")
+            app.var_desc.set("Nuevo evento")
+            app.agregar_evento()
+            app.update_idletasks()
+        incremental_ms = (time.perf_counter() - inicio) * 1000 / muestras
+
+        inicio = time.perf_counter()
+        app.refrescar_tree()
+        app.update_idletasks()
+        repintado_ms = (time.perf_counter() - inicio) * 1000
+
+        con_solape = comprobar_conflictos(app, consultas)
+        resultados[n] = (carga_ms, incremental_ms, repintado_ms)
+        print(f"[{'virtual' if modo_virtual else 'normal'}] {n:>7} eventos: carga {carga_ms:.0f} ms | "
+              f"agregar {incremental_ms:.3f} ms/evento | repintado completo {repintado_ms:.1f} ms "
+              f"| filas en el Treeview: {len(app.tree.get_children())} "
+              f"| solapes detectados: {con_solape}/{muestras}")
+        app.destroy()
+    return resultados
 
 
 # -------------------------------
 #  Punto de entrada
 # -------------------------------
 if __name__ == "__main__":
-    app = AgendaApp()
+    if "--bench" in sys.argv:
+        benchmark_agregar()
+        benchmark_agregar(modo_virtual=True)
+        sys.exit(0)
+
+    instalar_gancho()
+    app = AgendaApp(modo_virtual="--virtual" in sys.argv, archivo=ARCHIVO_EVENTOS)
+    app.iniciar_vigilancia()
     app.mainloop()
@@ -1,17 +1,32 @@
+import os
+import random
+import sys
+import time
 import tkinter as tk
 from tkinter import messagebox
 
+# Módulos compartidos con la app de la Semana 16 (almacén en disco, tramos, vigilante)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+from almacen_tareas import AlmacenTareasArchivo  # noqa: E402
+from tramos import tramos_consecutivos  # noqa: E402
+from vigilante_bucle import VigilanteBucleMixin, instalar_gancho  # noqa: E402
+
+TASKS_FILE = "tareas_todo.jsonl"
+COLOR_PENDING = "black"
+COLOR_COMPLETED = "green"
+
 
 # -------------------------
 # Clase principal de la aplicación
 # -------------------------
-class TodoApp:
-    def __init__(self, root):
+class TodoApp(VigilanteBucleMixin):
+    def __init__(self, root, path=None):
         self.root = root
         self.root.title("Lista de Tareas")
         self.root.geometry("400x400")
 
-        # Lista para almacenar las tareas (texto y estado)
+        # Lista para almacenar las tareas (texto y estado).
+        # La fila i del Listbox muestra siempre self.tasks[i]: cada cambio toca sólo su fila.
         self.tasks = []
 
         # -------------------------
@@ -27,17 +42,25 @@ class TodoApp:
         self.btn_add = tk.Button(root, text="Añadir Tarea", command=self.add_task)
         self.btn_add.pack(pady=5)
 
-        self.btn_complete = tk.Button(root, text="Marcar como Completada", command=self.complete_task)
+        self.btn_complete = tk.Button(root, text="Marcar como Completadas", command=self.complete_task)
         self.btn_complete.pack(pady=5)
 
-        self.btn_delete = tk.Button(root, text="Eliminar Tarea", command=self.delete_task)
+        self.btn_delete = tk.Button(root, text="Eliminar Tareas", command=self.delete_task)
         self.btn_delete.pack(pady=5)
 
-        # Listbox para mostrar tareas
-        self.listbox = tk.Listbox(root, width=50, height=15, selectmode=tk.SINGLE)
+        # Listbox para mostrar tareas (Shift/Ctrl + clic para seleccionar varias)
+        self.listbox = tk.Listbox(root, width=50, height=15, selectmode=tk.EXTENDED)
         self.listbox.pack(pady=10)
         self.listbox.bind("<Double-1>", self.complete_task)  # Doble clic = completar tarea
 
+        # Persistencia opcional: carga en segundo plano y guardado diferido
+        self.store = None
+        if path:
+            self.store = AlmacenTareasArchivo(path, root, self.snapshot, al_error=self.on_save_error)
+            self.root.title("Lista de Tareas (cargando…)")
+            self.store.cargar(self.on_batch_loaded, self.on_load_finished)
+            self.root.protocol("WM_DELETE_WINDOW", self.close)
+
     # -------------------------
     # Funcionalidades principales
     # -------------------------
@@ -46,44 +69,156 @@ class TodoApp:
         """Añade una tarea desde el campo de entrada"""
         task_text = self.entry.get().strip()
         if task_text:
-            self.tasks.append({"text": task_text, "completed": False})
-            self.update_listbox()
+            self.add_tasks([task_text])
             self.entry.delete(0, tk.END)
+            self.changed()
         else:
             messagebox.showwarning("Advertencia", "No puedes añadir una tarea vacía.")
 
+    def add_tasks(self, texts, completed=False):
+        """Añade varias tareas al final con una sola inserción en el Listbox"""
+        self.append_tasks([{"text": text, "completed": completed} for text in texts])
+
+    def append_tasks(self, new_tasks):
+        """Agrega tareas ya construidas: un insert para todas y itemconfig sólo para las completadas"""
+        start = len(self.tasks)
+        if not new_tasks:
+            return
+        self.tasks.extend(new_tasks)
+        self.listbox.insert(tk.END, *(self.task_label(task) for task in new_tasks))
+        for index, task in enumerate(new_tasks, start=start):
+            if task["completed"]:
+                self.listbox.itemconfig(index, fg=COLOR_COMPLETED)
+
     def complete_task(self, event=None):
-        """Marca la tarea seleccionada como completada"""
-        try:
-            index = self.listbox.curselection()[0]
-            self.tasks[index]["completed"] = not self.tasks[index]["completed"]
-            self.update_listbox()
-        except IndexError:
+        """Marca las tareas seleccionadas como completadas (o las desmarca si ya lo estaban todas)"""
+        selection = self.listbox.curselection()
+        if not selection:
             messagebox.showwarning("Advertencia", "Selecciona una tarea para marcarla.")
+            return
+        completed = not all(self.tasks[index]["completed"] for index in selection)
+        for index in selection:
+            self.tasks[index]["completed"] = completed
+        for first, last in tramos_consecutivos(selection):
+            self.render_rows(first, last)
+        self.changed()
 
     def delete_task(self):
-        """Elimina la tarea seleccionada"""
-        try:
-            index = self.listbox.curselection()[0]
-            del self.tasks[index]
-            self.update_listbox()
-        except IndexError:
+        """Elimina las tareas seleccionadas"""
+        selection = self.listbox.curselection()
+        if not selection:
             messagebox.showwarning("Advertencia", "Selecciona una tarea para eliminarla.")
+            return
+        # Una sola pasada que compacta la lista, en vez de un 'del' (O(n)) por tarea
+        doomed = set(selection)
+        self.tasks = [task for index, task in enumerate(self.tasks) if index not in doomed]
+        # En el Listbox, un delete por tramo de filas consecutivas
+        for first, last in tramos_consecutivos(selection):
+            self.listbox.delete(first, last)
+        self.changed()
+
+    # -------------------------
+    # Vista
+    # -------------------------
+
+    @staticmethod
+    def task_label(task):
+        """Texto con el que se muestra una tarea"""
+        return f"✔ {task['text']}" if task["completed"] else task["text"]
+
+    def render_rows(self, first, last):
+        """Vuelve a dibujar las filas first..last con un delete y un insert"""
+        selected = [index for index in range(first, last + 1) if self.listbox.selection_includes(index)]
+        self.listbox.delete(first, last)
+        self.listbox.insert(first, *(self.task_label(task) for task in self.tasks[first:last + 1]))
+        for index in range(first, last + 1):
+            self.listbox.itemconfig(index, fg=COLOR_COMPLETED if self.tasks[index]["completed"] else COLOR_PENDING)
+        for index in selected:
+            self.listbox.selection_set(index)
 
     def update_listbox(self):
-        """Actualiza la visualización de la lista de tareas"""
+        """Redibuja la lista completa (sólo para cargas iniciales; los cambios usan render_rows)"""
         self.listbox.delete(0, tk.END)
-        for task in self.tasks:
+        if not self.tasks:
+            return
+        self.listbox.insert(tk.END, *(self.task_label(task) for task in self.tasks))
+        for index, task in enumerate(self.tasks):
             if task["completed"]:
-                self.listbox.insert(tk.END, f"✔ {task['text']}")
-            else:
-                self.listbox.insert(tk.END, task["text"])
+                self.listbox.itemconfig(index, fg=COLOR_COMPLETED)
+
+    # -------------------------
+    # Persistencia
+    # -------------------------
+
+    def snapshot(self):
+        """Copia de las tareas para el hilo que guarda: [(texto, completada), ...]"""
+        return [(task["text"], task["completed"]) for task in self.tasks]
+
+    def changed(self):
+        if self.store is not None:
+            self.store.programar_guardado()
+
+    def on_batch_loaded(self, batch):
+        self.append_tasks([{"text": text, "completed": completed} for text, completed in batch])
+
+    def on_load_finished(self, total):
+        self.root.title("Lista de Tareas")
+
+    def on_save_error(self, error):
+        """Avisa en el título si el último guardado falló (error=None: volvió a funcionar)"""
+        self.root.title("Lista de Tareas (¡no se pudo guardar!)" if error else "Lista de Tareas")
+
+    def close(self):
+        """Guarda lo pendiente (aunque la carga no haya terminado) antes de cerrar la ventana"""
+        if self.store is not None:
+            self.store.cerrar()
+            if self.store.ultimo_error is not None:
+                messagebox.showerror("Error al guardar",
+                                     f"No se pudieron guardar las tareas en {self.store.ruta}:\n{self.store.ultimo_error}")
+        self.root.destroy()
+
+
+# -------------------------
+# Benchmark (ejecutar con --bench)
+# -------------------------
+def benchmark_toggle(sizes=(10_000, 100_000), samples=200):
+    """Latencia de marcar/desmarcar una tarea con N tareas, frente a redibujar toda la lista"""
+    rnd = random.Random(1)
+    for size in sizes:
+        root = tk.Tk()
+        root.withdraw()
+        app = TodoApp(root)
+        app.add_tasks(f"Tarea {i}" for i in range(size))
+        root.update_idletasks()
+
+        start = time.perf_counter()
+        for _ in range(samples):
+            index = rnd.randrange(size)
+            app.listbox.selection_clear(0, tk.END)
+            app.listbox.selection_set(index)
+            app.complete_task()
+            root.update_idletasks()
+        toggle_ms = (time.perf_counter() - start) * 1000 / samples
+
+        start = time.perf_counter()
+        app.update_listbox()
+        root.update_idletasks()
+        full_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{size:>7} tareas: marcar {toggle_ms:.3f} ms | redibujar todo {full_ms:.1f} ms")
+        root.destroy()
 
 
 # -------------------------
 # Inicializar la aplicación
 # -------------------------
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark_toggle()
+        sys.exit(0)
+
+    instalar_gancho()
     root = tk.Tk()
-    app = TodoApp(root)
+    app = TodoApp(root, path=TASKS_FILE)
+    app.iniciar_vigilancia()
     root.mainloop()
@@ -1,11 +1,132 @@
+import heapq
+import os
+import sys
+import time
 import tkinter as tk
+from bisect import bisect_left
+from collections import deque
 from tkinter import messagebox
 
-class GestorTareas:
-    def __init__(self, root):
+# Módulos compartidos con la app de la Semana 15 (almacén en disco, tramos, vigilante)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "comun"))
+from almacen_tareas import AlmacenTareasArchivo  # noqa: E402
+from tramos import tramos_consecutivos  # noqa: E402
+from vigilante_bucle import VigilanteBucleMixin, instalar_gancho  # noqa: E402
+
+ARCHIVO_TAREAS = "tareas_gestor.jsonl"
+DEMORA_BUSQUEDA_MS = 150  # se filtra cuando se deja de teclear este tiempo
+PRESUPUESTO_HISTORIAL = 2_000_000  # bytes (aprox.) que puede ocupar el historial de deshacer
+VENTANA_COALESCER_S = 1.0  # dos cambios de estado seguidos de la misma tarea en este tiempo se anulan
+
+class IndiceTrigramas:
+    """Índice de subcadenas: cada trigrama del texto (en minúsculas) -> ids de las tareas que lo contienen."""
+
+    def __init__(self):
+        self.trigramas = {}
+        self.textos = {}
+
+    @staticmethod
+    def _trigramas(texto):
+        return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+    def agregar(self, id_tarea, texto):
+        texto = texto.casefold()
+        self.textos[id_tarea] = texto
+        for trigrama in self._trigramas(texto):
+            self.trigramas.setdefault(trigrama, set()).add(id_tarea)
+
+    def quitar(self, id_tarea):
+        for trigrama in self._trigramas(self.textos.pop(id_tarea)):
+            ids = self.trigramas[trigrama]
+            ids.discard(id_tarea)
+            if not ids:
+                del self.trigramas[trigrama]
+
+    def coincide(self, id_tarea, consulta):
+        return consulta.casefold() in self.textos[id_tarea]
+
+    def buscar(self, consulta):
+        """Ids, en orden, de las tareas cuyo texto contiene la consulta"""
+        consulta = consulta.casefold()
+        if len(consulta) < 3:
+            # Con 1-2 letras no hay trigramas: se revisan los textos
+            return sorted(id_tarea for id_tarea, texto in self.textos.items() if consulta in texto)
+        conjuntos = []
+        for trigrama in self._trigramas(consulta):
+            ids = self.trigramas.get(trigrama)
+            if not ids:
+                return []
+            conjuntos.append(ids)
+        conjuntos.sort(key=len)  # se parte del trigrama más raro
+        candidatos = conjuntos[0].intersection(*conjuntos[1:])
+        # Tener todos los trigramas no asegura la subcadena completa: se confirma
+        return sorted(id_tarea for id_tarea in candidatos if consulta in self.textos[id_tarea])
+
+class HistorialCambios:
+    """
+    Pilas de deshacer/rehacer que guardan sólo lo que cambió, nunca copias de la lista:
+        ("c", id)                      cambio de estado (se deshace repitiéndolo)
+        ("a", id, texto)               alta
+        ("e", id, texto, completada)   baja
+        ("C", (id, ...))               cambio de estado de varias tareas a la vez
+        ("E", ((id, texto, completada), ...))   baja de varias tareas a la vez
+    Si el historial supera el presupuesto de memoria se olvidan los cambios más antiguos.
+    """
+
+    def __init__(self, presupuesto=PRESUPUESTO_HISTORIAL, ventana=VENTANA_COALESCER_S):
+        self.presupuesto = presupuesto
+        self.ventana = ventana
+        self.deshacer = deque()
+        self.rehacer = []
+        self.bytes = 0  # tamaño aproximado de ambas pilas
+        self._ultimo = 0.0
+
+    @staticmethod
+    def costo(cambio):
+        if cambio[0] == "C":
+            return sys.getsizeof(cambio) + sys.getsizeof(cambio[1])
+        if cambio[0] == "E":
+            return (sys.getsizeof(cambio) + sys.getsizeof(cambio[1])
+                    + sum(sys.getsizeof(baja) + sys.getsizeof(baja[1]) for baja in cambio[1]))
+        return sys.getsizeof(cambio) + sum(sys.getsizeof(dato) for dato in cambio[2:3])
+
+    def registrar(self, cambio):
+        ahora = time.monotonic()
+        for anterior in self.rehacer:
+            self.bytes -= self.costo(anterior)
+        self.rehacer.clear()
+        if (cambio[0] == "c" and self.deshacer and self.deshacer[-1] == cambio
+                and ahora - self._ultimo < self.ventana):
+            # Marcar y desmarcar enseguida la misma tarea: los dos cambios se anulan
+            self.bytes -= self.costo(self.deshacer.pop())
+        else:
+            self.deshacer.append(cambio)
+            self.bytes += self.costo(cambio)
+            while self.bytes > self.presupuesto and self.deshacer:
+                self.bytes -= self.costo(self.deshacer.popleft())
+        self._ultimo = ahora
+
+    def tomar_deshacer(self):
+        if not self.deshacer:
+            return None
+        cambio = self.deshacer.pop()
+        self.rehacer.append(cambio)
+        self._ultimo = 0.0  # lo deshecho ya no se coalesce con el siguiente cambio
+        return cambio
+
+    def tomar_rehacer(self):
+        if not self.rehacer:
+            return None
+        cambio = self.rehacer.pop()
+        self.deshacer.append(cambio)
+        self._ultimo = 0.0
+        return cambio
+
+class GestorTareas(VigilanteBucleMixin):
+    def __init__(self, root, ruta=None):
         self.root = root
         self.root.title("Gestión de Tareas")
-        self.root.geometry("400x400")
+        self.root.geometry("400x440")
         self.root.resizable(False, False)
 
         # Campo de entrada
@@ -13,8 +134,22 @@ class GestorTareas:
         self.entry_tarea.pack(pady=10)
         self.entry_tarea.focus()
 
+        # Búsqueda incremental
+        frame_busqueda = tk.Frame(root)
+        frame_busqueda.pack()
+        tk.Label(frame_busqueda, text="Buscar (Ctrl+F):").pack(side=tk.LEFT)
+        self.var_busqueda = tk.StringVar()
+        self.entry_busqueda = tk.Entry(frame_busqueda, width=28, textvariable=self.var_busqueda)
+        self.entry_busqueda.pack(side=tk.LEFT, padx=5)
+        # Sin los atajos de la ventana: escribir "c" o "d" aquí no completa ni elimina tareas
+        self.entry_busqueda.bindtags((str(self.entry_busqueda), "Entry", "all"))
+        self.entry_busqueda.bind("<Escape>", lambda event: self.limpiar_busqueda())
+        self.entry_busqueda.bind("<Return>", lambda event: self.lista_tareas.focus_set())
+        self.var_busqueda.trace_add("write", lambda *args: self.programar_filtro())
+
         # Lista de tareas
-        self.lista_tareas = tk.Listbox(root, width=50, height=15, selectmode=tk.SINGLE)
+        # Shift/Ctrl + clic para seleccionar varias
+        self.lista_tareas = tk.Listbox(root, width=50, height=15, selectmode=tk.EXTENDED)
         self.lista_tareas.pack(pady=10)
 
         # Botones
@@ -38,52 +173,287 @@ class GestorTareas:
         self.root.bind("<d>", lambda event: self.eliminar_tarea())
         self.root.bind("<D>", lambda event: self.eliminar_tarea())
         self.root.bind("<Escape>", lambda event: self.cerrar_aplicacion())
+        self.root.bind("<Control-f>", lambda event: self.enfocar_busqueda())
+        self.root.bind("<Control-F>", lambda event: self.enfocar_busqueda())
+        self.root.bind("<Control-z>", lambda event: self.deshacer())
+        self.root.bind("<Control-Z>", lambda event: self.deshacer())
+        self.root.bind("<Control-y>", lambda event: self.rehacer())
+        self.root.bind("<Control-Y>", lambda event: self.rehacer())
 
-        # Lista para manejar el estado de tareas
+        # Lista para manejar el estado de tareas, ordenada por id (las nuevas van al final)
         self.tareas = []
+        self.siguiente_id = 1
+        self.indice = IndiceTrigramas()
+        self.filtro = ""
+        self.filas = None  # con filtro: id de la tarea que muestra cada fila del Listbox
+        self.temporizador_filtro = None
+        self.historial = HistorialCambios()
+
+        # Persistencia opcional: carga en segundo plano y guardado diferido
+        self.almacen = None
+        if ruta:
+            self.almacen = AlmacenTareasArchivo(ruta, root, self.instantanea, al_error=self.error_guardado)
+            self.root.title("Gestión de Tareas (cargando…)")
+            self.almacen.cargar(self.lote_cargado, self.carga_terminada)
+            self.root.protocol("WM_DELETE_WINDOW", self.salir)
 
     def agregar_tarea(self):
-        tarea = self.entry_tarea.get().strip()
-        if tarea:
-            self.tareas.append({"texto": tarea, "completada": False})
-            self.lista_tareas.insert(tk.END, tarea)
+        texto = self.entry_tarea.get().strip()
+        if texto:
+            tarea = self.nueva_tarea(texto)
+            if self.filas is None or self.indice.coincide(tarea["id"], self.filtro):
+                self.anexar_filas([tarea])
             self.entry_tarea.delete(0, tk.END)
+            self.historial.registrar(("a", tarea["id"], texto))
+            self.hubo_cambios()
         else:
             messagebox.showwarning("Advertencia", "Escribe una tarea antes de agregarla.")
 
     def completar_tarea(self):
         seleccion = self.lista_tareas.curselection()
         if seleccion:
-            index = seleccion[0]
-            tarea = self.tareas[index]
-            if not tarea["completada"]:
-                tarea["completada"] = True
-                self.lista_tareas.delete(index)
-                self.lista_tareas.insert(index, f"✔ {tarea['texto']}")
-                self.lista_tareas.itemconfig(index, fg="green")
-            else:
-                tarea["completada"] = False
-                self.lista_tareas.delete(index)
-                self.lista_tareas.insert(index, tarea["texto"])
-                self.lista_tareas.itemconfig(index, fg="black")
+            # Se completan todas las seleccionadas, o se desmarcan si ya lo estaban todas
+            tareas = [self.tareas[self.posicion(fila)] for fila in seleccion]
+            completada = not all(tarea["completada"] for tarea in tareas)
+            ids = tuple(tarea["id"] for tarea in tareas if tarea["completada"] != completada)
+            for id_tarea in ids:
+                self.alternar(id_tarea)
+            self.historial.registrar(("c", ids[0]) if len(ids) == 1 else ("C", ids))
+            self.hubo_cambios()
         else:
             messagebox.showinfo("Info", "Selecciona una tarea para marcarla como completada.")
 
     def eliminar_tarea(self):
         seleccion = self.lista_tareas.curselection()
         if seleccion:
-            index = seleccion[0]
-            self.lista_tareas.delete(index)
-            del self.tareas[index]
+            if len(seleccion) == 1:
+                tarea = self.quitar(self.tareas[self.posicion(seleccion[0])]["id"])
+                self.historial.registrar(("e", tarea["id"], tarea["texto"], tarea["completada"]))
+            else:
+                bajas = self.quitar_varias({self.tareas[self.posicion(fila)]["id"] for fila in seleccion})
+                self.historial.registrar(("E", tuple((t["id"], t["texto"], t["completada"]) for t in bajas)))
+            self.hubo_cambios()
         else:
             messagebox.showinfo("Info", "Selecciona una tarea para eliminarla.")
 
+    # Deshacer / rehacer
+    def deshacer(self):
+        cambio = self.historial.tomar_deshacer()
+        if cambio is None:
+            self.root.bell()
+            return
+        self.aplicar_cambio(cambio, deshaciendo=True)
+
+    def rehacer(self):
+        cambio = self.historial.tomar_rehacer()
+        if cambio is None:
+            self.root.bell()
+            return
+        self.aplicar_cambio(cambio, deshaciendo=False)
+
+    def aplicar_cambio(self, cambio, deshaciendo):
+        tipo = cambio[0]
+        afectadas = []  # tareas que siguen (o vuelven a estar) en la lista, para seleccionarlas
+        if tipo == "C":
+            for id_tarea in cambio[1]:
+                self.alternar(id_tarea)
+            afectadas = cambio[1]
+        elif tipo == "E":
+            if deshaciendo:
+                self.insertar_varias([{"id": i, "texto": texto, "completada": c} for i, texto, c in cambio[1]])
+                afectadas = [baja[0] for baja in cambio[1]]
+            else:
+                self.quitar_varias({baja[0] for baja in cambio[1]})
+        elif tipo == "c":
+            self.alternar(cambio[1])
+            afectadas = [cambio[1]]
+        elif (tipo == "e") == deshaciendo:
+            # Deshacer una baja o rehacer un alta: la tarea vuelve a su sitio (mismo id)
+            completada = cambio[3] if tipo == "e" else False
+            self.insertar({"id": cambio[1], "texto": cambio[2], "completada": completada})
+            afectadas = [cambio[1]]
+        else:
+            self.quitar(cambio[1])
+        self.lista_tareas.selection_clear(0, tk.END)
+        filas = [fila for fila in map(self.fila_de, afectadas) if fila is not None]
+        for primera, ultima in tramos_consecutivos(filas):
+            self.lista_tareas.selection_set(primera, ultima)
+        if filas:
+            self.lista_tareas.see(min(filas))
+        self.hubo_cambios()
+
+    # Modelo y vista
+    def nueva_tarea(self, texto, completada=False):
+        tarea = {"id": self.siguiente_id, "texto": texto, "completada": completada}
+        self.siguiente_id += 1
+        self.tareas.append(tarea)
+        self.indice.agregar(tarea["id"], texto)
+        return tarea
+
+    def posicion(self, fila):
+        # Índice en self.tareas de la tarea que muestra esa fila (bisect por id, sin recorrer la lista)
+        if self.filas is None:
+            return fila
+        return self.indice_de(self.filas[fila])
+
+    def indice_de(self, id_tarea):
+        # self.tareas está ordenada por id: bisect en vez de recorrerla
+        return bisect_left(self.tareas, id_tarea, key=lambda tarea: tarea["id"])
+
+    def fila_de(self, id_tarea):
+        # Fila del Listbox que muestra la tarea, o None si el filtro la oculta
+        if self.filas is None:
+            return self.indice_de(id_tarea)
+        fila = bisect_left(self.filas, id_tarea)
+        return fila if fila < len(self.filas) and self.filas[fila] == id_tarea else None
+
+    def pintar_fila(self, fila, tarea):
+        seleccionada = self.lista_tareas.selection_includes(fila)
+        self.lista_tareas.delete(fila)
+        self.lista_tareas.insert(fila, f"✔ {tarea['texto']}" if tarea["completada"] else tarea["texto"])
+        self.lista_tareas.itemconfig(fila, fg="green" if tarea["completada"] else "black")
+        if seleccionada:
+            self.lista_tareas.selection_set(fila)
+
+    def alternar(self, id_tarea):
+        tarea = self.tareas[self.indice_de(id_tarea)]
+        tarea["completada"] = not tarea["completada"]
+        fila = self.fila_de(id_tarea)
+        if fila is not None:
+            self.pintar_fila(fila, tarea)
+
+    def insertar(self, tarea):
+        # Vuelve a poner una tarea en su posición según su id (al deshacer una baja)
+        posicion = self.indice_de(tarea["id"])
+        self.tareas.insert(posicion, tarea)
+        self.indice.agregar(tarea["id"], tarea["texto"])
+        if self.filas is None:
+            fila = posicion
+        elif self.indice.coincide(tarea["id"], self.filtro):
+            fila = bisect_left(self.filas, tarea["id"])
+            self.filas.insert(fila, tarea["id"])
+        else:
+            return
+        self.lista_tareas.insert(fila, f"✔ {tarea['texto']}" if tarea["completada"] else tarea["texto"])
+        if tarea["completada"]:
+            self.lista_tareas.itemconfig(fila, fg="green")
+
+    def quitar(self, id_tarea):
+        fila = self.fila_de(id_tarea)
+        tarea = self.tareas.pop(self.indice_de(id_tarea))
+        self.indice.quitar(id_tarea)
+        if fila is not None:
+            self.lista_tareas.delete(fila)
+            if self.filas is not None:
+                del self.filas[fila]
+        return tarea
+
+    def quitar_varias(self, ids):
+        # Una sola pasada que compacta la lista (y el filtro) en vez de un 'del' por tarea
+        filas = [fila for fila in map(self.fila_de, ids) if fila is not None]
+        quedan, quitadas = [], []
+        for tarea in self.tareas:
+            (quitadas if tarea["id"] in ids else quedan).append(tarea)
+        self.tareas = quedan
+        for id_tarea in ids:
+            self.indice.quitar(id_tarea)
+        if self.filas is not None:
+            self.filas = [id_tarea for id_tarea in self.filas if id_tarea not in ids]
+        # En el Listbox, un delete por tramo de filas consecutivas
+        for primera, ultima in tramos_consecutivos(filas):
+            self.lista_tareas.delete(primera, ultima)
+        return quitadas
+
+    def insertar_varias(self, tareas):
+        # Mezcla ordenada por id (una pasada) y se redibuja la vista de una vez
+        tareas = sorted(tareas, key=lambda tarea: tarea["id"])
+        self.tareas = list(heapq.merge(self.tareas, tareas, key=lambda tarea: tarea["id"]))
+        for tarea in tareas:
+            self.indice.agregar(tarea["id"], tarea["texto"])
+        self.redibujar()
+
+    def anexar_filas(self, tareas):
+        # Un solo insert; sólo las completadas necesitan itemconfig
+        if not tareas:
+            return
+        inicio = self.lista_tareas.size()
+        self.lista_tareas.insert(tk.END, *(f"✔ {t['texto']}" if t["completada"] else t["texto"] for t in tareas))
+        for index, tarea in enumerate(tareas, start=inicio):
+            if tarea["completada"]:
+                self.lista_tareas.itemconfig(index, fg="green")
+        if self.filas is not None:
+            self.filas.extend(tarea["id"] for tarea in tareas)
+
+    # Búsqueda
+    def enfocar_busqueda(self):
+        self.entry_busqueda.focus_set()
+        self.entry_busqueda.select_range(0, tk.END)
+
+    def limpiar_busqueda(self):
+        self.var_busqueda.set("")
+        self.lista_tareas.focus_set()
+
+    def programar_filtro(self):
+        # Debounce: cada tecla reinicia la espera
+        if self.temporizador_filtro is not None:
+            self.root.after_cancel(self.temporizador_filtro)
+        self.temporizador_filtro = self.root.after(DEMORA_BUSQUEDA_MS, self.aplicar_filtro)
+
+    def aplicar_filtro(self):
+        self.temporizador_filtro = None
+        self.filtro = self.var_busqueda.get().strip()
+        self.redibujar()
+
+    def redibujar(self):
+        # Vuelve a llenar el Listbox con el filtro actual (un delete y un insert)
+        self.lista_tareas.delete(0, tk.END)
+        if not self.filtro:
+            self.filas = None
+            visibles = self.tareas
+        else:
+            self.filas = []
+            ids = self.indice.buscar(self.filtro)
+            visibles = [self.tareas[self.indice_de(id_tarea)] for id_tarea in ids]
+        self.anexar_filas(visibles)
+
     def cerrar_aplicacion(self):
         if messagebox.askokcancel("Salir", "¿Deseas cerrar la aplicación?"):
-            self.root.destroy()
+            self.salir()
+
+    def salir(self):
+        # Terminar la carga si sigue en curso y escribir un guardado pendiente antes de cerrar
+        if self.almacen is not None:
+            self.almacen.cerrar()
+            if self.almacen.ultimo_error is not None:
+                messagebox.showerror("Error al guardar",
+                                     f"No se pudieron guardar las tareas en {self.almacen.ruta}:\n{self.almacen.ultimo_error}")
+        self.root.destroy()
+
+    # Persistencia
+    def instantanea(self):
+        return [(tarea["texto"], tarea["completada"]) for tarea in self.tareas]
+
+    def hubo_cambios(self):
+        if self.almacen is not None:
+            self.almacen.programar_guardado()
+
+    def lote_cargado(self, lote):
+        tareas = [self.nueva_tarea(texto, completada) for texto, completada in lote]
+        if self.filas is not None:
+            tareas = [tarea for tarea in tareas if self.indice.coincide(tarea["id"], self.filtro)]
+        self.anexar_filas(tareas)
+
+    def carga_terminada(self, total):
+        self.root.title("Gestión de Tareas")
+
+    def error_guardado(self, error):
+        # error=None: una escritura posterior volvió a funcionar
+        self.root.title("Gestión de Tareas (¡no se pudo guardar!)" if error else "Gestión de Tareas")
 
 # Ejecutar aplicación
 if __name__ == "__main__":
+    instalar_gancho()
     root = tk.Tk()
-    app = GestorTareas(root)
+    app = GestorTareas(root, ruta=ARCHIVO_TAREAS)
+    app.iniciar_vigilancia()
     root.mainloop()
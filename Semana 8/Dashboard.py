@@ -2,23 +2,411 @@ import json
 
 import os
 
-ARCHIVO_TAREAS = "tareas.json"
+import random
+
+import shutil
+
+import sys
+
+import tempfile
+
+import time
+
+from bisect import bisect_left, insort
+
+from contextlib import contextmanager
+
+from itertools import islice
+
+from multiprocessing import Pool
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+ARCHIVO_TAREAS = os.environ.get("DASHBOARD_TAREAS", "tareas.json")
+
+ESTADOS = ("pendiente", "completada")
+
+FILTROS = {"todas": None, "pendientes": "pendiente", "completadas": "completada"}
+
+TAMANO_PAGINA = 20
+
+
+class AlmacenTareas:
+    """
+    Almacén de tareas en memoria respaldado por disco.
+
+    - El archivo JSON (instantánea) se lee UNA vez; los cambios se anotan en un
+      diario de operaciones (<archivo>.log, una línea JSON por operación) que
+      sólo se extiende al final, sin reescribir la lista completa.
+    - Los cambios quedan "sucios" en memoria hasta persistir().
+    - Si otro proceso modifica los archivos (cambia su mtime o tamaño) se
+      vuelve a leer: sólo la cola nueva del diario si únicamente creció, o todo
+      si la instantánea cambió.
+    - Cuando el diario crece demasiado se compacta en la instantánea.
+    - Índice por estado: {estado: [posiciones ordenadas]}, para contar en O(1)
+      y paginar vistas filtradas sin recorrer todas las tareas.
+    - Cada tarea tiene un "id" entero único, estable una vez persistida; {id: posición} permite
+      completarla en O(1). El diario registra el cambio de UNA tarea por su id,
+      así que actualizar un registro no reescribe el archivo.
+    - Varios procesos pueden compartir el archivo: la escritura se hace bajo un
+      bloqueo exclusivo (fcntl sobre <archivo>.lock) y la lectura bajo uno
+      compartido. El control es optimista: las operaciones se preparan en
+      memoria sin bloqueo; al persistir, si la versión en disco cambió, se
+      deshacen las propias, se aplica lo escrito por los demás y se vuelven a
+      aplicar encima (las tareas nuevas reciben un id libre; completar una
+      tarea que otro ya completó no es un conflicto).
+    """
+
+    MAX_OPERACIONES_DIARIO = 1000
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.ruta_diario = ruta + ".log"
+        self._tareas = []
+        self._por_estado = {estado: [] for estado in ESTADOS}
+        self._posicion_por_id = {}
+        self._siguiente_id = 1
+        self._pendientes = []          # operaciones aún no escritas en el diario
+        self._cargado = False
+        self._firma_instantanea = None  # (mtime_ns, tamaño) tras nuestra última lectura/escritura
+        self._firma_diario = None
+        self._operaciones_diario = 0
+        self._bloqueos = 0              # profundidad del bloqueo entre procesos
+        self.fusiones = 0               # operaciones propias reubicadas por escrituras ajenas
+
+    # ---------- Disco ----------
+    @staticmethod
+    def _firma(ruta):
+        """Versión de un archivo: (inodo, mtime_ns, tamaño). Cambia con cualquier escritura."""
+        try:
+            st = os.stat(ruta)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    @contextmanager
+    def _bloqueo(self, exclusivo):
+        """Bloqueo entre procesos; si ya se tiene uno (llamada anidada) no se vuelve a pedir."""
+        if fcntl is None or self._bloqueos:
+            self._bloqueos += 1
+            try:
+                yield
+            finally:
+                self._bloqueos -= 1
+            return
+        with open(self.ruta + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+            self._bloqueos += 1
+            try:
+                yield
+            finally:
+                self._bloqueos -= 1
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _aplicar(self, op):
+        if op["op"] == "agregar":
+            self._anexar(op["tarea"])
+        elif op["op"] == "completar":
+            if "id" in op:
+                self._cambiar_estado(self._posicion_por_id[op["id"]], "completada")
+            else:
+                self._cambiar_estado(op["indice"], "completada")  # diarios anteriores a los IDs
+
+    def _anexar(self, tarea):
+        if "id" not in tarea:
+            tarea["id"] = self._siguiente_id  # tareas antiguas sin id: se numeran por orden
+        self._siguiente_id = max(self._siguiente_id, tarea["id"] + 1)
+        self._posicion_por_id[tarea["id"]] = len(self._tareas)
+        self._por_estado.setdefault(tarea["estado"], []).append(len(self._tareas))
+        self._tareas.append(tarea)
+
+    def _cambiar_estado(self, indice, estado):
+        tarea = self._tareas[indice]
+        if tarea["estado"] == estado:
+            return
+        anterior = self._por_estado[tarea["estado"]]
+        del anterior[bisect_left(anterior, indice)]
+        insort(self._por_estado.setdefault(estado, []), indice)
+        tarea["estado"] = estado
+
+    def _reconstruir_indices(self):
+        tareas = self._tareas
+        self._tareas = []
+        self._por_estado = {estado: [] for estado in ESTADOS}
+        self._posicion_por_id = {}
+        self._siguiente_id = 1
+        for tarea in tareas:
+            self._anexar(tarea)
+
+    def _leer_diario(self, desde=0):
+        """Aplica las operaciones del diario a partir del byte 'desde'."""
+        try:
+            with open(self.ruta_diario, "rb") as f:
+                f.seek(desde)
+                for linea in f:
+                    if not linea.endswith(b"\n"):
+                        break  # línea a medio escribir por otro proceso
+                    self._aplicar(json.loads(linea))
+                    self._operaciones_diario += 1
+        except FileNotFoundError:
+            pass
+        self._firma_diario = self._firma(self.ruta_diario)
+
+    def _cargar_todo(self):
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                self._tareas = json.load(f)
+        except FileNotFoundError:
+            self._tareas = []
+        self._reconstruir_indices()
+        self._firma_instantanea = self._firma(self.ruta)
+        self._operaciones_diario = 0
+        self._leer_diario()
+        self._cargado = True
+
+    def _deshacer_pendientes(self):
+        """Quita del estado en memoria las operaciones aún no persistidas y las devuelve."""
+        pendientes = self._pendientes
+        for op in reversed(pendientes):
+            if op["op"] == "agregar":
+                tarea = self._tareas.pop()
+                del self._posicion_por_id[tarea["id"]]
+                self._por_estado[tarea["estado"]].pop()
+            elif op["op"] == "completar":
+                self._cambiar_estado(self._posicion_por_id[op["id"]], "pendiente")
+        self._siguiente_id = self._tareas[-1]["id"] + 1 if self._tareas else 1
+        self._pendientes = []
+        return pendientes
+
+    def _reaplicar(self, pendientes):
+        """Vuelve a aplicar operaciones propias sobre el estado actualizado desde disco."""
+        nuevos_ids = {}
+        for op in pendientes:
+            if op["op"] == "agregar":
+                tarea = op["tarea"]
+                if tarea["id"] != self._siguiente_id:
+                    # Otro proceso usó ese id: la tarea nueva se renumera
+                    nuevos_ids[tarea["id"]] = self._siguiente_id
+                    tarea["id"] = self._siguiente_id
+                    self.fusiones += 1
+            elif op["op"] == "completar":
+                op = {"op": "completar", "id": nuevos_ids.get(op["id"], op["id"])}
+                posicion = self._posicion_por_id.get(op["id"])
+                if posicion is None or self._tareas[posicion]["estado"] != "pendiente":
+                    self.fusiones += 1  # ya la completó otro proceso: nada que hacer
+                    continue
+            self._aplicar(op)
+            self._pendientes.append(op)
+
+    def _sincronizar(self):
+        """Recarga sólo si otro proceso tocó los archivos desde nuestra última lectura."""
+        if (self._cargado and self._firma(self.ruta) == self._firma_instantanea
+                and self._firma(self.ruta_diario) == self._firma_diario):
+            return
+        with self._bloqueo(exclusivo=False):
+            pendientes = self._deshacer_pendientes()
+            firma = self._firma(self.ruta_diario)
+            conocido = self._firma_diario[2] if self._firma_diario else 0
+            if (self._cargado and self._firma(self.ruta) == self._firma_instantanea
+                    and firma is not None and firma[2] >= conocido):
+                # El diario sólo creció: basta con aplicar la cola nueva
+                self._leer_diario(conocido)
+            else:
+                self._cargar_todo()
+            self._reaplicar(pendientes)
+
+    def persistir(self):
+        """Escribe en el diario las operaciones pendientes (no hace nada si no hay cambios)."""
+        if not self._pendientes:
+            return
+        with self._bloqueo(exclusivo=True):
+            # Con el bloqueo exclusivo nadie más escribe entre la comprobación y la escritura
+            self._sincronizar()
+            if not self._pendientes:
+                return
+            with open(self.ruta_diario, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(op, ensure_ascii=False) + "\n" for op in self._pendientes))
+            self._operaciones_diario += len(self._pendientes)
+            self._pendientes = []
+            self._firma_diario = self._firma(self.ruta_diario)
+            if self._operaciones_diario > self.MAX_OPERACIONES_DIARIO:
+                self._escribir_instantanea()
+
+    def compactar(self):
+        """Vuelca el estado completo en la instantánea (escritura atómica) y vacía el diario."""
+        with self._bloqueo(exclusivo=True):
+            self._sincronizar()
+            self._escribir_instantanea()
+
+    def _escribir_instantanea(self):
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self._tareas, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporal, self.ruta)
+        self._pendientes = []
+        open(self.ruta_diario, "w").close()
+        self._firma_instantanea = self._firma(self.ruta)
+        self._firma_diario = self._firma(self.ruta_diario)
+        self._operaciones_diario = 0
+
+    @property
+    def sucio(self):
+        return bool(self._pendientes)
+
+    # ---------- Operaciones ----------
+    def _registrar(self, op):
+        """Aplica y anota una operación; quien llama ya sincronizó (los ids dependen de ello)."""
+        self._aplicar(op)
+        self._pendientes.append(op)
+
+    def tareas(self):
+        self._sincronizar()
+        return self._tareas
+
+    def contar(self, estado=None):
+        """Número de tareas (de un estado o en total) sin recorrer la lista."""
+        self._sincronizar()
+        if estado is None:
+            return len(self._tareas)
+        return len(self._por_estado.get(estado, ()))
+
+    def resumen(self):
+        return (f"Pendientes: {self.contar('pendiente')} | Completadas: {self.contar('completada')}"
+                f" | Total: {self.contar()}")
+
+    def iterar(self, estado=None, desde=0, cantidad=None):
+        """Genera (posición, tarea) en orden, opcionalmente filtrando por estado y paginando."""
+        self._sincronizar()
+        hasta = None if cantidad is None else desde + cantidad
+        if estado is None:
+            fin = len(self._tareas) if hasta is None else min(hasta, len(self._tareas))
+            for indice in range(desde, fin):
+                yield indice, self._tareas[indice]
+        else:
+            for indice in islice(self._por_estado.get(estado, ()), desde, hasta):
+                yield indice, self._tareas[indice]
+
+    def ultimo_id(self):
+        """Mayor id asignado hasta ahora (0 si no hay tareas): ningún id mayor existe."""
+        self._sincronizar()
+        return self._siguiente_id - 1
+
+    def obtener(self, id_tarea):
+        self._sincronizar()
+        posicion = self._posicion_por_id.get(id_tarea)
+        return None if posicion is None else self._tareas[posicion]
+
+    def agregar(self, tarea):
+        """
+        Agrega la tarea asignándole el siguiente id libre y devuelve ese id. Es provisional
+        hasta persistir(): si antes otro proceso agrega tareas, al sincronizar la nueva se
+        renumera detrás de las suyas (ver _reaplicar).
+        """
+        self._sincronizar()
+        tarea = dict(tarea, id=self._siguiente_id)
+        self._registrar({"op": "agregar", "tarea": tarea})
+        return tarea["id"]
+
+    def _completar_sincronizado(self, id_tarea):
+        """completar() sin sincronizar: quien llama ya lo hizo."""
+        posicion = self._posicion_por_id.get(id_tarea)
+        if posicion is None or self._tareas[posicion]["estado"] != "pendiente":
+            return False
+        self._registrar({"op": "completar", "id": id_tarea})
+        return True
+
+    def completar(self, id_tarea):
+        """Marca como completada la tarea con ese id. False si no existe o ya estaba completada."""
+        self._sincronizar()
+        return self._completar_sincronizado(id_tarea)
+
+    def completar_varias(self, ids):
+        """Completa varias tareas por id; devuelve (ids completados, ids rechazados)."""
+        self._sincronizar()  # una sola vez para todo el lote
+        completadas, rechazadas = [], []
+        for id_tarea in ids:
+            (completadas if self._completar_sincronizado(id_tarea) else rechazadas).append(id_tarea)
+        return completadas, rechazadas
+
+    def reemplazar(self, tareas):
+        """Sustituye todas las tareas (reescritura completa, sólo para importaciones)."""
+        self._tareas = list(tareas)
+        self._reconstruir_indices()
+        self._pendientes = []
+        self._cargado = True
+        with self._bloqueo(exclusivo=True):
+            self._escribir_instantanea()
+
+
+class AlmacenTareasMemoria(AlmacenTareas):
+    """Mismo API que AlmacenTareas pero sin disco: para pruebas, otras herramientas y benchmarks."""
+
+    def __init__(self, tareas=()):
+        super().__init__(":memoria:")
+        self._tareas = [dict(t) for t in tareas]
+        self._reconstruir_indices()
+        self._cargado = True
+
+    def _sincronizar(self):
+        pass
+
+    def persistir(self):
+        self._pendientes = []
+
+    def compactar(self):
+        self._pendientes = []
+
+    def reemplazar(self, tareas):
+        self._tareas = list(tareas)
+        self._reconstruir_indices()
+        self._pendientes = []
+
+
+BACKENDS = {"archivo": AlmacenTareas, "memoria": AlmacenTareasMemoria}
 
-# Crear archivo de tareas si no existe
+# El almacén se crea en el primer uso (importar este módulo no toca el disco)
+_configuracion = {"ruta": ARCHIVO_TAREAS, "backend": "archivo"}
 
-if not os.path.exists(ARCHIVO_TAREAS):
-    with open(ARCHIVO_TAREAS, "w") as f:
-        json.dump([], f)
+_almacen = None
+
+
+def configurar_almacen(ruta=None, backend="archivo"):
+    """Elige archivo y backend ("archivo" o "memoria"); se aplica en el siguiente uso."""
+    global _almacen
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend!r}. Opciones: {', '.join(BACKENDS)}")
+
+    _configuracion["ruta"] = ruta or ARCHIVO_TAREAS
+
+    _configuracion["backend"] = backend
+
+    _almacen = None
+
+
+def obtener_almacen():
+    global _almacen
+
+    if _almacen is None:
+
+        if _configuracion["backend"] == "memoria":
+            _almacen = AlmacenTareasMemoria()
+
+        else:
+            _almacen = BACKENDS[_configuracion["backend"]](_configuracion["ruta"])
+
+    return _almacen
 
 
 def cargar_tareas():
-    with open(ARCHIVO_TAREAS, "r") as f:
-        return json.load(f)
+    return obtener_almacen().tareas()
 
 
 def guardar_tareas(tareas):
-    with open(ARCHIVO_TAREAS, "w") as f:
-        json.dump(tareas, f, indent=4)
+    obtener_almacen().reemplazar(tareas)
 
 
 def agregar_tarea():
@@ -28,62 +416,161 @@ def agregar_tarea():
 
     tarea = {"titulo": titulo, "descripcion": descripcion, "estado": "pendiente"}
 
-    tareas = cargar_tareas()
+    almacen = obtener_almacen()
 
-    tareas.append(tarea)
+    almacen.agregar(tarea)
 
-    guardar_tareas(tareas)
+    almacen.persistir()
 
     print("Tarea agregada con éxito.")
 
 
-def ver_tareas(filtro="todas"):
-    tareas = cargar_tareas()
-
-    if filtro == "pendientes":
+def ver_tareas(filtro="todas", tamano_pagina=TAMANO_PAGINA):
+    estado = FILTROS.get(filtro)
 
-        tareas = [t for t in tareas if t["estado"] == "pendiente"]
+    almacen = obtener_almacen()
 
-    elif filtro == "completadas":
+    total = almacen.contar(estado)
 
-        tareas = [t for t in tareas if t["estado"] == "completada"]
+    print(almacen.resumen())
 
-    if not tareas:
+    if not total:
 
         print("No hay tareas para mostrar.")
 
-    else:
+        return
 
-        for idx, tarea in enumerate(tareas, start=1):
-            print(f"{idx}. {tarea['titulo']} - {tarea['estado']}")
+    # Se imprime página a página a partir del índice, sin construir la lista filtrada
+    for desde in range(0, total, tamano_pagina):
+
+        for numero, (_, tarea) in enumerate(almacen.iterar(estado, desde, tamano_pagina), start=desde + 1):
+            print(f"{numero}. [#{tarea['id']}] {tarea['titulo']} - {tarea['estado']}")
 
             print(f"   {tarea['descripcion']}")
 
+        if desde + tamano_pagina < total:
 
-def completar_tarea():
-    tareas = cargar_tareas()
+            pagina = desde // tamano_pagina + 1
 
+            paginas = (total + tamano_pagina - 1) // tamano_pagina
+
+            if input(f"-- Página {pagina}/{paginas}. Enter para continuar, 'q' para volver: ").strip().lower() == "q":
+                break
+
+
+def parsear_ids(texto, ultimo_id):
+    """
+    Convierte '3', '3,7,9' o '10-20' (o combinaciones) en una lista de ids.
+    Los rangos se recortan a 'ultimo_id' (más allá no hay tareas), así '1-999999999'
+    no genera mil millones de ids; un rango que empieza después se rechaza.
+    """
+    ids = []
+
+    for parte in texto.replace(" ", "").split(","):
+
+        if not parte:
+            continue
+
+        try:
+
+            inicio, fin = (int(x) for x in parte.split("-", 1)) if "-" in parte else (int(parte), None)
+
+        except ValueError:
+            raise ValueError(f"Id no válido: {parte}") from None
+
+        if fin is not None:
+
+            if inicio > fin:
+                raise ValueError(f"Rango inválido: {parte}")
+
+            if inicio > ultimo_id:
+                raise ValueError(f"Rango fuera de las tareas existentes (último id: {ultimo_id}): {parte}")
+
+            ids.extend(range(inicio, min(fin, ultimo_id) + 1))
+
+        else:
+
+            ids.append(inicio)
+
+    if not ids:
+        raise ValueError("No se indicó ningún id")
+
+    return ids
+
+
+def completar_tarea():
     ver_tareas("pendientes")
 
+    almacen = obtener_almacen()
+
+    texto = input("ID(s) de la tarea a completar (ej. 4, 2,5 o 10-15): ")
+
     try:
 
-        idx = int(input("Número de la tarea que deseas marcar como completada: ")) - 1
+        ids = parsear_ids(texto, almacen.ultimo_id())
 
-        if 0 <= idx < len(tareas) and tareas[idx]["estado"] == "pendiente":
+    except ValueError as error:
 
-            tareas[idx]["estado"] = "completada"
+        print(f"{error}. Intenta nuevamente.")
 
-            guardar_tareas(tareas)
+        return
 
-            print("Tarea marcada como completada.")
+    completadas, rechazadas = almacen.completar_varias(ids)
 
-        else:
+    almacen.persistir()
+
+    if completadas:
 
-            print("Número inválido o tarea ya completada.")
+        print(f"Tareas marcadas como completadas: {len(completadas)}.")
 
-    except:
+    if rechazadas:
 
-        print("Entrada no válida. Intenta nuevamente.")
+        print(f"IDs inexistentes o ya completados: {len(rechazadas)}.")
+
+
+def _escritor_concurrente(args):
+    """Proceso escritor del benchmark: agrega tareas y completa algunas al azar."""
+    ruta, numero, cantidad = args
+    almacen = AlmacenTareas(ruta)
+    rnd = random.Random(numero)
+    for i in range(cantidad):
+        almacen.agregar({"titulo": f"p{numero}-{i}", "descripcion": "", "estado": "pendiente"})
+        almacen.persistir()
+        if rnd.random() < 0.3:
+            almacen.completar(rnd.randint(1, max(1, almacen.contar())))
+            almacen.persistir()
+    return almacen.fusiones
+
+
+def benchmark_concurrente(procesos=4, tareas_por_proceso=500):
+    """
+    Lanza varios procesos que escriben a la vez sobre el mismo archivo y comprueba
+    que no se pierde ninguna tarea. Devuelve True si el resultado es consistente.
+    Trabaja en un directorio temporal que se borra al terminar.
+    """
+    directorio = tempfile.mkdtemp(prefix="tareas_benchmark_")
+    try:
+        ruta = os.path.join(directorio, "tareas.json")
+        inicio = time.perf_counter()
+        with Pool(procesos) as pool:
+            fusiones = sum(pool.map(_escritor_concurrente, [(ruta, n, tareas_por_proceso) for n in range(procesos)]))
+        segundos = time.perf_counter() - inicio
+
+        almacen = AlmacenTareas(ruta)
+        titulos = [t["titulo"] for t in almacen.tareas()]
+        ids = [t["id"] for t in almacen.tareas()]
+        resumen = almacen.resumen()
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    esperados = {f"p{n}-{i}" for n in range(procesos) for i in range(tareas_por_proceso)}
+    perdidas = len(esperados - set(titulos))
+    ok = perdidas == 0 and len(titulos) == len(esperados) and len(set(ids)) == len(ids)
+
+    print(f"{procesos} procesos x {tareas_por_proceso} tareas en {segundos:.2f}s "
+          f"({len(esperados) / segundos:,.0f} tareas/s), fusiones={fusiones}")
+    print(f"Tareas en disco: {len(titulos)}, perdidas: {perdidas}, ids únicos: {len(set(ids)) == len(ids)}")
+    print(resumen)
+    return ok
 
 
 def mostrar_menu():
@@ -91,6 +578,8 @@ def mostrar_menu():
 
         print("\n=== DASHBOARD DE TAREAS DE POO ===")
 
+        print(obtener_almacen().resumen())
+
         print("1. Agregar nueva tarea")
 
         print("2. Ver todas las tareas")
@@ -137,5 +626,11 @@ def mostrar_menu():
 
 
 if __name__ == "__main__":
+    if "--bench-concurrente" in sys.argv:
+        sys.exit(0 if benchmark_concurrente() else 1)
+
+    if "--memoria" in sys.argv:
+        configurar_almacen(backend="memoria")
+
     mostrar_menu()
 
@@ -0,0 +1,331 @@
+"""
+Benchmark de respuesta de las apps Tkinter:
+    Semana 13: App (gestor de ítems)      Semana 14: AgendaApp
+    Semana 15: TodoApp                    Semana 16: GestorTareas
+
+Para cada app y tamaño de datos se precarga la app con N elementos y se ejecutan
+sus operaciones (llamando a los mismos métodos que los botones y atajos) dentro de
+mainloop(), con la raíz oculta. Se registra:
+- latencia por operación (incluye update_idletasks, es decir, el redibujado pendiente);
+- bloqueos del bucle de eventos: un latido con after() cada LATIDO_MS mide cuánto
+  tarda en volver a ejecutarse; el retraso sobre lo programado es el bloqueo.
+
+Los resultados (p50/p95/p99/máx/media en ms) se guardan en JSON para comparar
+entre versiones:
+    python benchmarks/benchmark_gui.py --tamanos 1000,10000 --salida antes.json
+    python benchmarks/benchmark_gui.py --salida despues.json --comparar antes.json
+
+Sin pantalla (servidor, CI) usar --xvfb: se arranca un Xvfb si está instalado.
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import glob
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+import tkinter as tk
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LATIDO_MS = 5
+TAMANOS = (1_000, 10_000, 100_000)
+MUESTRAS = 200
+
+Operacion = Tuple[str, Callable[[], None]]
+
+
+# -----------------------------
+# Utilidades
+# -----------------------------
+def cargar_modulo(carpeta: str, nombre: str, archivo: str = "*.py"):
+    """Importa un script por su ruta (los nombres tienen espacios y tildes)."""
+    rutas = sorted(glob.glob(os.path.join(RAIZ_REPO, carpeta, archivo)))
+    if not rutas:
+        raise FileNotFoundError(f"No se encontró {archivo} en {carpeta}")
+    spec = importlib.util.spec_from_file_location(nombre, rutas[0])
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def resumir(valores_s: List[float]) -> Dict[str, float]:
+    """Percentiles en milisegundos de una lista de duraciones en segundos."""
+    if not valores_s:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "media": 0.0}
+    ordenados = sorted(v * 1000 for v in valores_s)
+
+    def percentil(p: float) -> float:
+        return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+    return {"p50": round(percentil(50), 4), "p95": round(percentil(95), 4), "p99": round(percentil(99), 4),
+            "max": round(ordenados[-1], 4), "media": round(sum(ordenados) / len(ordenados), 4)}
+
+
+def asegurar_pantalla(usar_xvfb: bool):
+    """Devuelve el proceso Xvfb arrancado (o None si ya había pantalla)."""
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        return None
+    if not usar_xvfb or not shutil.which("Xvfb"):
+        sys.exit("No hay pantalla (DISPLAY). Instale Xvfb y use --xvfb, o ejecute con xvfb-run.")
+    pantalla = ":99"
+    proceso = subprocess.Popen(["Xvfb", pantalla, "-screen", "0", "1280x800x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = pantalla
+    time.sleep(0.5)
+    return proceso
+
+
+def medir(root: tk.Misc, operaciones: List[Operacion], muestras: int) -> Tuple[Dict[str, List[float]], List[float]]:
+    """
+    Ejecuta las operaciones en rueda ('muestras' veces cada una) dentro de mainloop(),
+    una por vuelta del bucle, mientras un latido de after() mide los bloqueos.
+    """
+    latencias: Dict[str, List[float]] = {nombre: [] for nombre, _ in operaciones}
+    bloqueos: List[float] = []
+    pendientes = deque(operacion for _ in range(muestras) for operacion in operaciones)
+    estado = {"ultimo": time.perf_counter(), "latido": None}
+
+    def latido() -> None:
+        ahora = time.perf_counter()
+        bloqueos.append(max(0.0, ahora - estado["ultimo"] - LATIDO_MS / 1000))
+        estado["ultimo"] = ahora
+        estado["latido"] = root.after(LATIDO_MS, latido)
+
+    def siguiente() -> None:
+        if not pendientes:
+            root.after_cancel(estado["latido"])
+            root.quit()
+            return
+        nombre, funcion = pendientes.popleft()
+        inicio = time.perf_counter()
+        funcion()
+        root.update_idletasks()
+        latencias[nombre].append(time.perf_counter() - inicio)
+        root.after(1, siguiente)
+
+    estado["latido"] = root.after(LATIDO_MS, latido)
+    root.after(LATIDO_MS, siguiente)
+    root.mainloop()
+    return latencias, bloqueos
+
+
+def seleccionar_al_azar(listbox, rnd: random.Random) -> bool:
+    """Selecciona una fila cualquiera; False si la lista (quizá filtrada) está vacía."""
+    listbox.selection_clear(0, tk.END)
+    if not listbox.size():
+        return False
+    listbox.selection_set(rnd.randrange(listbox.size()))
+    return True
+
+
+# -----------------------------
+# Escenarios: cada uno devuelve (raíz, operaciones) con la app ya cargada con n elementos
+# -----------------------------
+def escenario_semana13(n: int, rnd: random.Random):
+    modulo = cargar_modulo("Semana 13", "semana13_app")
+    root = tk.Tk()
+    root.withdraw()
+    app = modulo.App(root)
+    textos = app.model.add_many(f"Ítem {i}" for i in range(n))
+    app.listbox.insert(tk.END, *textos)
+    contador = iter(range(n, 10 * n + 10_000))
+
+    def agregar() -> None:
+        app.input_var.set(f"Ítem {next(contador)}")
+        app._on_add()
+
+    def agregar_duplicado() -> None:
+        app.input_var.set(f"Ítem {rnd.randrange(n)}")
+        app._on_add()
+
+    def eliminar_seleccion() -> None:
+        if seleccionar_al_azar(app.listbox, rnd):
+            app._on_clear_selected()
+
+    return root, [("agregar", agregar), ("agregar_duplicado", agregar_duplicado),
+                  ("eliminar_seleccion", eliminar_seleccion)]
+
+
+def escenario_semana14(n: int, rnd: random.Random, modo_virtual: bool = False):
+    modulo = cargar_modulo("Semana 14", "semana14_agenda", "Componentes y contenedores.py")
+    app = modulo.AgendaApp(modo_virtual=modo_virtual)
+    app.withdraw()
+    # Sin diálogos de confirmación: se mide la búsqueda de solapes y se acepta siempre
+    def confirmar_sin_dialogo(datos, ignorar=None) -> bool:
+        fecha, hora, _, repetir = datos
+        app.eventos.conflictos(fecha, hora, repetir, ignorar=ignorar)
+        return True
+
+    app.confirmar_conflictos = confirmar_sin_dialogo
+    inicio = dt.date(2024, 1, 1)
+
+    def fecha_al_azar() -> dt.date:
+        return inicio + dt.timedelta(days=rnd.randrange(3 * 365))
+
+    for _ in range(n):
+        app.eventos.agregar(fecha_al_azar(), f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}", "Evento")
+    app.refrescar_tree()
+
+    def agregar() -> None:
+        app.set_fecha(fecha_al_azar())
+        app.var_hora.set(f"{rnd.randrange(24):02d}:30")
+        app.var_desc.set("Nuevo evento")
+        app.agregar_evento()
+
+    def consultar_mes() -> None:
+        fecha = fecha_al_azar()
+        app.eventos.del_mes(fecha.year, fecha.month)
+
+    operaciones = [("agregar", agregar), ("consultar_mes", consultar_mes)]
+    if modo_virtual:
+        operaciones.append(("desplazar", lambda: app.desplazar_virtual("moveto", rnd.random())))
+    return app, operaciones
+
+
+def escenario_semana15(n: int, rnd: random.Random):
+    modulo = cargar_modulo("Semana 15", "semana15_todo")
+    root = tk.Tk()
+    root.withdraw()
+    app = modulo.TodoApp(root)
+    app.add_tasks(f"Tarea {i}" for i in range(n))
+
+    def agregar() -> None:
+        app.entry.delete(0, tk.END)
+        app.entry.insert(0, "Nueva tarea")
+        app.add_task()
+
+    def completar() -> None:
+        if seleccionar_al_azar(app.listbox, rnd):
+            app.complete_task()
+
+    def eliminar() -> None:
+        if seleccionar_al_azar(app.listbox, rnd):
+            app.delete_task()
+
+    return root, [("agregar", agregar), ("completar", completar), ("eliminar", eliminar)]
+
+
+def escenario_semana16(n: int, rnd: random.Random):
+    modulo = cargar_modulo("Semana 16", "semana16_gestor")
+    root = tk.Tk()
+    root.withdraw()
+    app = modulo.GestorTareas(root)
+    palabras = ("informe", "cliente", "pagar", "revisar", "enviar", "llamar", "proyecto", "factura")
+    app.lote_cargado([(f"{rnd.choice(palabras)} {rnd.choice(palabras)} {i}", False) for i in range(n)])
+
+    def agregar() -> None:
+        app.entry_tarea.delete(0, tk.END)
+        app.entry_tarea.insert(0, f"{rnd.choice(palabras)} nueva")
+        app.agregar_tarea()
+
+    def completar() -> None:
+        if seleccionar_al_azar(app.lista_tareas, rnd):
+            app.completar_tarea()
+
+    def eliminar() -> None:
+        if seleccionar_al_azar(app.lista_tareas, rnd):
+            app.eliminar_tarea()
+
+    def buscar() -> None:
+        # Alterna una búsqueda y la lista completa; se aplica sin esperar al debounce
+        consulta = "" if app.filtro else f"{rnd.choice(palabras)} {rnd.choice(palabras)}"
+        app.var_busqueda.set(consulta)
+        if app.temporizador_filtro is not None:
+            root.after_cancel(app.temporizador_filtro)
+        app.aplicar_filtro()
+
+    return root, [("agregar", agregar), ("completar", completar), ("eliminar", eliminar),
+                  ("deshacer", app.deshacer), ("buscar", buscar)]
+
+
+ESCENARIOS = {
+    "semana13_app": escenario_semana13,
+    "semana14_agenda": escenario_semana14,
+    "semana14_agenda_virtual": lambda n, rnd: escenario_semana14(n, rnd, modo_virtual=True),
+    "semana15_todo": escenario_semana15,
+    "semana16_gestor": escenario_semana16,
+}
+
+
+# -----------------------------
+# Ejecución y comparación
+# -----------------------------
+def ejecutar(escenarios: List[str], tamanos: List[int], muestras: int, semilla: int = 1) -> List[dict]:
+    resultados = []
+    for nombre in escenarios:
+        for n in tamanos:
+            rnd = random.Random(semilla)
+            inicio = time.perf_counter()
+            root, operaciones = ESCENARIOS[nombre](n, rnd)
+            root.update()
+            carga_s = time.perf_counter() - inicio
+            latencias, bloqueos = medir(root, operaciones, muestras)
+            root.destroy()
+            for operacion, valores in latencias.items():
+                resultados.append({"app": nombre, "tamano": n, "operacion": operacion,
+                                   "muestras": len(valores), "latencia_ms": resumir(valores)})
+            resultados.append({"app": nombre, "tamano": n, "operacion": "_bucle_de_eventos",
+                               "muestras": len(bloqueos), "carga_ms": round(carga_s * 1000, 1),
+                               "bloqueo_ms": resumir(bloqueos)})
+            print(f"{nombre:<24} n={n:>7}: carga {carga_s * 1000:7.0f} ms | "
+                  + " | ".join(f"{op} p95 {resumir(v)['p95']:.2f} ms" for op, v in latencias.items())
+                  + f" | bloqueo máx {resumir(bloqueos)['max']:.1f} ms")
+    return resultados
+
+
+def comparar(actuales: List[dict], ruta_anterior: str, tolerancia: float = 1.25) -> int:
+    """Compara el p95 con un resultado anterior; devuelve cuántas operaciones empeoraron."""
+    with open(ruta_anterior, "r", encoding="utf-8") as f:
+        anteriores = {(r["app"], r["tamano"], r["operacion"]): r for r in json.load(f)["resultados"]}
+    empeoradas = 0
+    for r in actuales:
+        previo = anteriores.get((r["app"], r["tamano"], r["operacion"]))
+        if previo is None:
+            continue
+        metrica = "bloqueo_ms" if "bloqueo_ms" in r else "latencia_ms"
+        antes, ahora = previo[metrica]["p95"], r[metrica]["p95"]
+        if antes > 0 and ahora > antes * tolerancia:
+            empeoradas += 1
+            print(f"EMPEORÓ {r['app']} n={r['tamano']} {r['operacion']}: p95 {antes:.2f} -> {ahora:.2f} ms")
+    print(f"Comparación con {ruta_anterior}: {empeoradas} operación(es) más lentas de x{tolerancia}.")
+    return empeoradas
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de respuesta de las apps Tkinter.")
+    parser.add_argument("--apps", default=",".join(ESCENARIOS), help="escenarios separados por comas")
+    parser.add_argument("--tamanos", default=",".join(map(str, TAMANOS)))
+    parser.add_argument("--muestras", type=int, default=MUESTRAS, help="repeticiones de cada operación")
+    parser.add_argument("--salida", default="resultados_gui.json")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior")
+    parser.add_argument("--xvfb", action="store_true", help="arrancar Xvfb si no hay pantalla")
+    args = parser.parse_args()
+
+    xvfb = asegurar_pantalla(args.xvfb)
+    try:
+        resultados = ejecutar(args.apps.split(","), [int(t) for t in args.tamanos.split(",")], args.muestras)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump({"fecha": dt.datetime.now().isoformat(timespec="seconds"),
+                   "python": platform.python_version(), "tk": tk.TkVersion,
+                   "plataforma": platform.platform(), "latido_ms": LATIDO_MS,
+                   "resultados": resultados}, f, ensure_ascii=False, indent=1)
+    print(f"Resultados guardados en {args.salida}")
+    if args.comparar:
+        return 1 if comparar(resultados, args.comparar) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
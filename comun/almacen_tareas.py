@@ -0,0 +1,334 @@
+"""
+Almacén en disco compartido por las apps de tareas con Tkinter
+(Semana 15: TodoApp, Semana 16: GestorTareas).
+
+- Formato: una tarea por línea, como lista JSON ["texto", completada].
+- La carga corre en un hilo y las tareas llegan a la interfaz por lotes con after().
+- Guardado diferido: cada cambio (re)programa un guardado dentro de
+  DEMORA_GUARDADO_MS, así una ráfaga de cambios produce una sola escritura.
+- La escritura (archivo temporal + os.replace) la hace un hilo escritor; si llegan
+  varias instantáneas mientras escribe, sólo se escribe la última.
+- El hilo de Tk nunca toca el disco: sólo copia la lista de tareas en memoria.
+- Si la ventana se cierra durante la carga, cerrar() la termina (entrega los lotes
+  que falten) y después guarda, así no se pierden los cambios hechos mientras cargaba.
+- Los errores de lectura y escritura llegan a la interfaz por al_error, en el hilo
+  de Tk. Si la carga falla no se guarda nada: se reemplazaría un archivo sin leer.
+
+Ejecutar este archivo con --bench mide, sin abrir ventanas, cuánto se bloquea el
+bucle de eventos al guardar y cargar un archivo grande.
+"""
+from __future__ import annotations
+import heapq
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+Tarea = Tuple[str, bool]  # (texto, completada)
+
+DEMORA_GUARDADO_MS = 400
+TAMANO_LOTE = 2_000  # tareas entregadas a la interfaz por cada after()
+
+
+class AlmacenTareasArchivo:
+    """
+    Persistencia de una lista de tareas sin bloquear el bucle de eventos.
+
+    'widget' es cualquier objeto con after()/after_cancel() (la raíz de Tk).
+    'instantanea' devuelve la lista actual como [(texto, completada), ...]; se
+    llama en el hilo de Tk justo antes de cada guardado.
+    'al_error' (opcional) se llama en el hilo de Tk con la excepción de una carga o
+    escritura fallida, o con None cuando una escritura posterior vuelve a funcionar.
+    """
+
+    def __init__(self, ruta: str, widget, instantanea: Callable[[], Iterable[Tarea]],
+                 demora_ms: int = DEMORA_GUARDADO_MS,
+                 al_error: Optional[Callable[[Optional[Exception]], None]] = None) -> None:
+        self.ruta = ruta
+        self.widget = widget
+        self.instantanea = instantanea
+        self.demora_ms = demora_ms
+        self.al_error = al_error
+        self.escrituras = 0
+        self.ultimo_error: Optional[Exception] = None
+        self._temporizador = None
+        self._cargado = False
+        self._guardar_al_cargar = False
+        self._carga: Optional[Tuple[threading.Thread, queue.Queue, Callable, Optional[Callable]]] = None
+        self._sondeo = None
+        self._pendiente: Optional[List[Tarea]] = None
+        self._escribiendo = False
+        self._resultados: queue.Queue = queue.Queue()  # un OSError o None por escritura terminada
+        self._revision = None
+        self._hay_trabajo = threading.Condition()
+        self._cerrando = False
+        self._escritor: Optional[threading.Thread] = None
+
+    # ------------------------
+    # Carga
+    # ------------------------
+    def leer(self) -> List[Tarea]:
+        """
+        Lee el archivo completo (se llama desde el hilo de carga). Las líneas dañadas se
+        ignoran; se decodifican una a una para que un carácter cortado sólo pierda su línea.
+        """
+        tareas: List[Tarea] = []
+        try:
+            with open(self.ruta, "rb") as f:
+                for linea in f:
+                    try:
+                        texto, completada = json.loads(linea.decode("utf-8"))
+                    except (TypeError, ValueError):  # incluye JSONDecodeError y UnicodeDecodeError
+                        continue
+                    tareas.append((str(texto), bool(completada)))
+        except FileNotFoundError:
+            pass
+        return tareas
+
+    def cargar(self, al_recibir_lote: Callable[[List[Tarea]], None],
+               al_terminar: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Lee el archivo en un hilo. En el hilo de Tk se llama a al_recibir_lote(lote)
+        por cada TAMANO_LOTE tareas, en orden, y al final a al_terminar(total).
+        Hasta entonces no se guarda nada, para no pisar el archivo con una lista a medias.
+        Si la lectura falla, al_terminar recibe lo entregado y el error va a al_error.
+        """
+        cola: queue.Queue = queue.Queue()
+
+        def trabajar() -> None:
+            total, error = 0, RuntimeError(f"la carga de {self.ruta} terminó sin completarse")
+            try:
+                tareas = self.leer()
+                for i in range(0, len(tareas), TAMANO_LOTE):
+                    lote = tareas[i:i + TAMANO_LOTE]
+                    cola.put(("lote", lote))
+                    total += len(lote)
+                error = None
+            except Exception as e:  # p. ej. PermissionError: la interfaz no debe quedarse esperando
+                error = e
+            finally:
+                cola.put(("fin", (total, error)))
+
+        lector = threading.Thread(target=trabajar, daemon=True)
+        self._carga = (lector, cola, al_recibir_lote, al_terminar)
+        lector.start()
+        self._sondeo = self.widget.after(20, self._sondear)
+
+    def _sondear(self) -> None:
+        # Un lote por vuelta del bucle de eventos: la interfaz sigue respondiendo
+        mensaje = self._siguiente_mensaje()
+        if mensaje is None:
+            self._sondeo = self.widget.after(20, self._sondear)
+        elif self._procesar_carga(*mensaje):
+            self._sondeo = self.widget.after(1, self._sondear)
+
+    def _siguiente_mensaje(self) -> Optional[Tuple[str, object]]:
+        """Siguiente mensaje del hilo de carga, o None si aún no hay ninguno."""
+        lector, cola, _, _ = self._carga
+        vivo = lector.is_alive()
+        try:
+            return cola.get_nowait()
+        except queue.Empty:
+            if vivo:
+                return None
+        # El hilo terminó sin avisar (no debería pasar): se trata como una carga fallida
+        return "fin", (0, RuntimeError(f"la carga de {self.ruta} terminó sin completarse"))
+
+    def _procesar_carga(self, tipo: str, dato) -> bool:
+        """Entrega un mensaje del hilo de carga; devuelve False cuando la carga terminó."""
+        _, _, al_recibir_lote, al_terminar = self._carga
+        if tipo == "lote":
+            al_recibir_lote(dato)
+            return True
+        total, error = dato
+        self._sondeo = None
+        self._cargado = error is None
+        if al_terminar is not None:
+            al_terminar(total)
+        if error is not None:
+            self.ultimo_error = error
+            if self.al_error is not None:
+                self.al_error(error)
+        elif self._guardar_al_cargar:
+            self.programar_guardado()
+        return False
+
+    def _terminar_carga(self) -> None:
+        """Espera al hilo de carga y entrega ya todos los lotes que falten (al cerrar)."""
+        lector, _, _, _ = self._carga
+        if self._sondeo is not None:
+            self.widget.after_cancel(self._sondeo)
+            self._sondeo = None
+        lector.join()
+        while self._procesar_carga(*self._siguiente_mensaje()):
+            pass
+
+    # ------------------------
+    # Guardado
+    # ------------------------
+    def programar_guardado(self) -> None:
+        """Avisar de un cambio: el guardado se aplaza hasta que pasen demora_ms sin cambios."""
+        if not self._cargado:
+            self._guardar_al_cargar = True  # o la carga falló: entonces no se guarda
+            return
+        if self._temporizador is not None:
+            self.widget.after_cancel(self._temporizador)
+        self._temporizador = self.widget.after(self.demora_ms, self._guardar)
+
+    def _guardar(self) -> None:
+        self._temporizador = None
+        tareas = list(self.instantanea())
+        with self._hay_trabajo:
+            self._pendiente = tareas
+            self._hay_trabajo.notify()
+        if self._escritor is None:
+            self._escritor = threading.Thread(target=self._bucle_escritor, daemon=True)
+            self._escritor.start()
+        if self.al_error is not None and self._revision is None:
+            self._revision = self.widget.after(100, self._revisar_escrituras)
+
+    def _bucle_escritor(self) -> None:
+        while True:
+            with self._hay_trabajo:
+                while self._pendiente is None and not self._cerrando:
+                    self._hay_trabajo.wait()
+                tareas, self._pendiente = self._pendiente, None
+                self._escribiendo = tareas is not None
+            if tareas is None:
+                return  # cerrando y sin nada pendiente
+            self._escribir(tareas)
+            with self._hay_trabajo:
+                self._escribiendo = False
+
+    def _revisar_escrituras(self) -> None:
+        """(Hilo de Tk) Pasa a al_error el resultado de las escrituras mientras quede alguna en curso."""
+        self._revision = None
+        sin_resultado = object()
+        resultado = sin_resultado
+        while not self._resultados.empty():
+            resultado = self._resultados.get_nowait()  # sólo importa la escritura más reciente
+        if resultado is not sin_resultado:
+            self.al_error(resultado)
+        with self._hay_trabajo:
+            en_curso = self._pendiente is not None or self._escribiendo
+        if en_curso or not self._resultados.empty():
+            self._revision = self.widget.after(100, self._revisar_escrituras)
+
+    def _escribir(self, tareas: List[Tarea]) -> None:
+        temporal = self.ruta + ".tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps([texto, completada], ensure_ascii=False) + "\n"
+                             for texto, completada in tareas)
+            os.replace(temporal, self.ruta)
+            self.escrituras += 1
+            self.ultimo_error = None
+        except OSError as e:
+            self.ultimo_error = e
+        self._resultados.put(self.ultimo_error)
+
+    def cerrar(self) -> None:
+        """
+        Termina una carga en curso, escribe un guardado aún programado y espera al hilo
+        escritor. Llamar al salir; después, ultimo_error indica si el último guardado falló.
+        """
+        if self._sondeo is not None:  # carga aún en curso
+            self._terminar_carga()
+        if self._revision is not None:
+            self.widget.after_cancel(self._revision)
+            self._revision = None
+        if self._temporizador is not None:
+            self.widget.after_cancel(self._temporizador)
+            self._guardar()
+        with self._hay_trabajo:
+            self._cerrando = True
+            self._hay_trabajo.notify()
+        if self._escritor is not None:
+            self._escritor.join()
+
+
+# -----------------------------
+# Medición sin pantalla (ejecutar con --bench)
+# -----------------------------
+class BucleSimulado:
+    """
+    Imita after()/after_cancel() de Tk en un solo hilo, para medir sin pantalla.
+    Registra cuánto tarda cada callback: ese tiempo es el que la interfaz estaría congelada.
+    """
+
+    def __init__(self) -> None:
+        self._agenda: list = []
+        self._cancelados: set = set()
+        self._contador = 0
+        self.bloqueo_max = 0.0
+
+    def after(self, ms: int, funcion: Callable[[], None]) -> int:
+        self._contador += 1
+        heapq.heappush(self._agenda, (time.perf_counter() + ms / 1000, self._contador, funcion))
+        return self._contador
+
+    def after_cancel(self, identificador: int) -> None:
+        self._cancelados.add(identificador)
+
+    def ejecutar_hasta(self, condicion: Callable[[], bool], limite_s: float = 120.0) -> None:
+        fin = time.perf_counter() + limite_s
+        while not condicion() and self._agenda and time.perf_counter() < fin:
+            instante, identificador, funcion = heapq.heappop(self._agenda)
+            if identificador in self._cancelados:
+                self._cancelados.discard(identificador)
+                continue
+            espera = instante - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            inicio = time.perf_counter()
+            funcion()
+            self.bloqueo_max = max(self.bloqueo_max, time.perf_counter() - inicio)
+
+
+def medir_bloqueo(n: int = 200_000) -> dict:
+    """Guarda y vuelve a cargar n tareas; informa del tiempo total y del mayor bloqueo del bucle."""
+    directorio = tempfile.mkdtemp(prefix="almacen_tareas_")
+    ruta = os.path.join(directorio, "tareas.jsonl")
+    tareas = [(f"Tarea número {i}", i % 3 == 0) for i in range(n)]
+    resultados = {}
+
+    bucle = BucleSimulado()
+    almacen = AlmacenTareasArchivo(ruta, bucle, lambda: tareas)
+    almacen.cargar(lambda lote: None)
+    bucle.ejecutar_hasta(lambda: almacen._cargado)
+    bucle.bloqueo_max = 0.0
+    inicio = time.perf_counter()
+    for _ in range(50):  # ráfaga de cambios: un solo guardado
+        almacen.programar_guardado()
+    bucle.ejecutar_hasta(lambda: almacen.escrituras >= 1)
+    almacen.cerrar()
+    resultados["guardar"] = (time.perf_counter() - inicio, bucle.bloqueo_max, almacen.escrituras)
+
+    bucle = BucleSimulado()
+    recibidas: List[Tarea] = []
+    terminado = []
+    almacen = AlmacenTareasArchivo(ruta, bucle, lambda: recibidas)
+    inicio = time.perf_counter()
+    almacen.cargar(recibidas.extend, terminado.append)
+    bucle.ejecutar_hasta(lambda: bool(terminado))
+    resultados["cargar"] = (time.perf_counter() - inicio, bucle.bloqueo_max, len(recibidas))
+    almacen.cerrar()
+
+    os.remove(ruta)
+    os.rmdir(directorio)
+    total, bloqueo, escrituras = resultados["guardar"]
+    print(f"Guardar {n:,} tareas: {total * 1000:.0f} ms en total, {escrituras} escritura(s), "
+          f"bloqueo máximo del bucle {bloqueo * 1000:.1f} ms")
+    total, bloqueo, cargadas = resultados["cargar"]
+    print(f"Cargar  {cargadas:,} tareas: {total * 1000:.0f} ms en total, "
+          f"bloqueo máximo del bucle {bloqueo * 1000:.1f} ms")
+    return resultados
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        medir_bloqueo()
@@ -0,0 +1,23 @@
+"""
+Utilidades para borrar o redibujar varias filas de un Listbox por tramos.
+
+Listbox.delete(primera, ultima) e insert() trabajan con filas consecutivas, así
+que una selección múltiple se agrupa primero en tramos: una llamada por tramo
+en lugar de una por fila. Lo usan las apps de las Semanas 13, 15 y 16.
+"""
+from __future__ import annotations
+from typing import Iterable, List, Tuple
+
+
+def tramos_consecutivos(filas: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    Agrupa filas en tramos consecutivos (primera, ultima), del último al primero:
+    en ese orden, borrar un tramo no desplaza las filas de los que faltan.
+    """
+    tramos: List[Tuple[int, int]] = []
+    for fila in sorted(filas, reverse=True):
+        if tramos and tramos[-1][0] == fila + 1:
+            tramos[-1] = (fila, tramos[-1][1])
+        else:
+            tramos.append((fila, fila))
+    return tramos
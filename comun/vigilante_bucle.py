@@ -0,0 +1,202 @@
+"""
+Vigilante de bloqueos del bucle de eventos para las apps Tkinter.
+
+- Un latido con after() cada LATIDO_MS comprueba cuánto tardó en volver a
+  ejecutarse; si el retraso supera el umbral, la ventana estuvo congelada.
+- Todos los callbacks que Tk llama en Python (command= de botones, manejadores
+  de bind, after, trazas de variables) pasan por tkinter.CallWrapper.
+  instalar_gancho() envuelve CallWrapper.__call__ para medir cada uno, así cada
+  bloqueo se atribuye al manejador que más tardó desde el latido anterior.
+  Tk guarda el método ya enlazado al registrar cada callback, por lo que el gancho
+  sólo mide los registrados DESPUÉS de instalarlo: para atribuirlos todos hay que
+  llamarlo antes de crear los widgets (iniciar_vigilancia() lo instala si falta).
+- La vigilancia es opcional: importar el módulo no cambia nada, así las pruebas y
+  benchmarks que crean las apps miden sin el gancho.
+- Cada bloqueo se escribe en el log "vigilante_bucle" y se guarda en memoria;
+  mostrar_informe_bloqueos() abre una ventana con el resumen por manejador.
+
+Uso:
+    class MiApp(VigilanteBucleMixin, tk.Tk):
+        ...
+
+    if __name__ == "__main__":
+        instalar_gancho()                    # antes de crear widgets
+        app = MiApp()
+        app.iniciar_vigilancia()             # F12 abre el informe
+        app.mainloop()
+"""
+from __future__ import annotations
+import inspect
+import logging
+import os
+import time
+import tkinter as tk
+from collections import deque
+from dataclasses import dataclass
+from tkinter import ttk
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+UMBRAL_MS = 200      # retraso del latido a partir del cual se considera bloqueo
+LATIDO_MS = 50
+MAX_BLOQUEOS = 500   # bloqueos guardados para el informe (los más antiguos se descartan)
+MANEJADOR_DESCONOCIDO = "(trabajo interno de Tk: redibujado, geometría…)"
+
+registro = logging.getLogger("vigilante_bucle")
+
+
+@dataclass
+class Bloqueo:
+    instante: float      # time.time() al detectarlo
+    duracion_ms: float   # retraso del latido sobre lo programado
+    manejador: str       # callback que más tardó durante el bloqueo
+    callback_ms: float   # lo que tardó ese callback
+
+
+# -----------------------------
+# Gancho sobre tkinter.CallWrapper
+# -----------------------------
+_vigilantes: List["VigilanteBucleMixin"] = []
+_call_original: Optional[Callable] = None
+
+
+def instalar_gancho() -> None:
+    """Envuelve CallWrapper.__call__ una sola vez. Sin vigilantes activos el coste es una comprobación."""
+    global _call_original
+    if _call_original is not None:
+        return
+    _call_original = original = tk.CallWrapper.__call__
+
+    def __call__(self, *args):
+        if not _vigilantes:
+            return original(self, *args)
+        inicio = time.perf_counter()
+        try:
+            return original(self, *args)
+        finally:
+            duracion = time.perf_counter() - inicio
+            for vigilante in _vigilantes:
+                vigilante._callback_terminado(self, duracion)
+
+    tk.CallWrapper.__call__ = __call__
+
+
+def describir_callback(envoltura) -> str:
+    """Nombre legible del callback: tipo (command/bind/after), función y widget."""
+    funcion = envoltura.func
+    tipo = "bind" if envoltura.subst else "command"
+    if getattr(funcion, "__qualname__", "").endswith("after.<locals>.callit"):
+        # after() registra una función interna 'callit' que llama a la del usuario
+        tipo = "after"
+        funcion = inspect.getclosurevars(funcion).nonlocals.get("func", funcion)
+    nombre = getattr(funcion, "__qualname__", type(funcion).__name__)
+    codigo = getattr(funcion, "__code__", None)
+    if "<lambda>" in nombre and codigo is not None:
+        nombre += f" ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+    widget = envoltura.widget
+    return f"{tipo} {nombre} [{type(widget).__name__} {getattr(widget, '_w', '?')}]"
+
+
+class VigilanteBucleMixin:
+    """
+    Mixin para cualquier clase de app (Tk, Frame o una clase con self.root).
+    No define __init__: todo se prepara en iniciar_vigilancia(), y la vigilancia
+    termina sola al destruirse el widget (o antes, con detener_vigilancia()).
+    """
+
+    def iniciar_vigilancia(self, widget: Optional[tk.Misc] = None, umbral_ms: int = UMBRAL_MS,
+                           latido_ms: int = LATIDO_MS, atajo: Optional[str] = "<F12>") -> None:
+        """
+        Empieza a vigilar. 'widget' da el after() del latido (por defecto self o self.root);
+        'atajo' (en la ventana principal) abre el informe de bloqueos.
+        """
+        instalar_gancho()
+        if widget is None:
+            widget = self if isinstance(self, tk.Misc) else self.root
+        self._vigilancia_widget = widget
+        self._vigilancia_umbral = umbral_ms / 1000
+        self._vigilancia_latido_ms = latido_ms
+        self._vigilancia_mas_lento: Tuple[float, object] = (0.0, None)
+        self._vigilancia_ultimo = time.perf_counter()
+        self.bloqueos: Deque[Bloqueo] = deque(maxlen=MAX_BLOQUEOS)
+        if self not in _vigilantes:
+            _vigilantes.append(self)
+        self._vigilancia_after = widget.after(latido_ms, self._latido_vigilancia)
+        # Al destruir el widget se deja de vigilar sola (en la raíz, <Destroy> llega también de los hijos)
+        widget.bind("<Destroy>", lambda event: str(event.widget) == str(widget) and self.detener_vigilancia(),
+                    add="+")
+        if atajo:
+            widget.winfo_toplevel().bind(atajo, lambda event: self.mostrar_informe_bloqueos(), add="+")
+
+    def detener_vigilancia(self) -> None:
+        if self in _vigilantes:
+            _vigilantes.remove(self)
+        if getattr(self, "_vigilancia_after", None) is not None:
+            try:
+                self._vigilancia_widget.after_cancel(self._vigilancia_after)
+            except tk.TclError:
+                pass  # el widget ya fue destruido
+            self._vigilancia_after = None
+
+    def _callback_terminado(self, envoltura, duracion: float) -> None:
+        if duracion > self._vigilancia_mas_lento[0]:
+            self._vigilancia_mas_lento = (duracion, envoltura)
+
+    def _latido_vigilancia(self) -> None:
+        ahora = time.perf_counter()
+        retraso = ahora - self._vigilancia_ultimo - self._vigilancia_latido_ms / 1000
+        if retraso > self._vigilancia_umbral:
+            duracion, envoltura = self._vigilancia_mas_lento
+            # Se describe sólo cuando hay bloqueo: el camino normal no cuesta nada
+            manejador = describir_callback(envoltura) if envoltura is not None else MANEJADOR_DESCONOCIDO
+            bloqueo = Bloqueo(time.time(), retraso * 1000, manejador, duracion * 1000)
+            self.bloqueos.append(bloqueo)
+            registro.warning("Bucle de eventos bloqueado %.0f ms; el callback más lento fue %s (%.0f ms)",
+                             bloqueo.duracion_ms, manejador, bloqueo.callback_ms)
+        self._vigilancia_mas_lento = (0.0, None)
+        self._vigilancia_ultimo = time.perf_counter()
+        self._vigilancia_after = self._vigilancia_widget.after(self._vigilancia_latido_ms, self._latido_vigilancia)
+
+    # -----------------------------
+    # Informe
+    # -----------------------------
+    def resumen_bloqueos(self) -> List[Dict[str, object]]:
+        """Bloqueos agrupados por manejador, del que más tiempo congeló la ventana al que menos."""
+        grupos: Dict[str, Dict[str, object]] = {}
+        for bloqueo in getattr(self, "bloqueos", ()):
+            grupo = grupos.setdefault(bloqueo.manejador, {"manejador": bloqueo.manejador, "veces": 0,
+                                                          "max_ms": 0.0, "total_ms": 0.0})
+            grupo["veces"] += 1
+            grupo["max_ms"] = max(grupo["max_ms"], bloqueo.duracion_ms)
+            grupo["total_ms"] += bloqueo.duracion_ms
+        return sorted(grupos.values(), key=lambda grupo: grupo["total_ms"], reverse=True)
+
+    def mostrar_informe_bloqueos(self) -> tk.Toplevel:
+        ventana = tk.Toplevel(self._vigilancia_widget)
+        ventana.title("Bloqueos del bucle de eventos")
+        ventana.geometry("720x300")
+        columnas = ("veces", "max", "total", "manejador")
+        tabla = ttk.Treeview(ventana, columns=columnas, show="headings")
+        for columna, titulo, ancho in (("veces", "Veces", 60), ("max", "Máx. (ms)", 80),
+                                       ("total", "Total (ms)", 90), ("manejador", "Manejador", 460)):
+            tabla.heading(columna, text=titulo)
+            tabla.column(columna, width=ancho, anchor="w" if columna == "manejador" else "e")
+        tabla.pack(fill="both", expand=True, padx=8, pady=(8, 4))
+
+        def rellenar() -> None:
+            tabla.delete(*tabla.get_children())
+            for grupo in self.resumen_bloqueos():
+                tabla.insert("", "end", values=(grupo["veces"], f"{grupo['max_ms']:.0f}",
+                                                f"{grupo['total_ms']:.0f}", grupo["manejador"]))
+
+        def limpiar() -> None:
+            self.bloqueos.clear()
+            rellenar()
+
+        botones = ttk.Frame(ventana)
+        botones.pack(fill="x", padx=8, pady=(0, 8))
+        ttk.Label(botones, text=f"Umbral: {self._vigilancia_umbral * 1000:.0f} ms").pack(side="left")
+        ttk.Button(botones, text="Cerrar", command=ventana.destroy).pack(side="right")
+        ttk.Button(botones, text="Limpiar", command=limpiar).pack(side="right", padx=6)
+        ttk.Button(botones, text="Actualizar", command=rellenar).pack(side="right")
+        rellenar()
+        return ventana